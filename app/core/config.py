@@ -1,4 +1,4 @@
-from pydantic import field_validator, computed_field
+from pydantic import Field, field_validator, computed_field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -35,6 +35,15 @@ class Config(BaseSettings):
     ASTERISK_UID: int
     ASTERISK_GID: int
 
+    # Максимум соединений к MySQL: 2 движка (main, cdr) × воркеры uvicorn ×
+    # (DB_POOL_SIZE + DB_MAX_OVERFLOW). По умолчанию 2 × 2 × 20 = 80 при
+    # max_connections=151 — остаётся запас под ODBC Asterisk и прочих клиентов.
+    # Увеличивая, держать сумму ниже max_connections (или поднять его у MySQL).
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 300
+
     @computed_field
     @property
     def DATABASE_URL(self) -> str:
@@ -50,6 +59,22 @@ class Config(BaseSettings):
     ALGORITHM: str = "HS256"
     SECRET_KEY: str
     REFRESH_SECRET_KEY: str
+    # ALGORITHM=EdDSA: PEM-файлы приватных ключей Ed25519 (access и refresh)
+    ED25519_PRIVATE_KEY_PATH: str = ""
+    ED25519_REFRESH_PRIVATE_KEY_PATH: str = ""
+    # kid в заголовке токена (для ротации ключей), пусто — без kid
+    JWT_KEY_ID: str = ""
+
+    # Argon2id: фиксированные параметры, одинаковые во всех воркерах
+    # (подбор под хост: python -m app.utils.argon2_calibrate)
+    ARGON2_MEMORY_KIB: int = Field(default=65536, gt=0)
+    ARGON2_TIME_COST: int = Field(default=1, gt=0)
+    ARGON2_PARALLELISM: int = Field(default=1, gt=0)
+    # Хеши слабее этих значений пересчитываются при входе (не при любом расхождении)
+    ARGON2_REHASH_BELOW_MEMORY_KIB: int = 46 * 1024
+    ARGON2_REHASH_BELOW_TIME_COST: int = 1
+    # Память воркера под одновременные хеши: потоков = бюджет // ARGON2_MEMORY_KIB
+    ARGON2_MEMORY_BUDGET_MIB: int = Field(default=512, gt=0)
 
     LDAP_ENABLED: bool
     LDAP_SERVER: str
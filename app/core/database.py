@@ -4,11 +4,23 @@ from sqlalchemy.orm import sessionmaker
 from app.core.config import config
 
 
-engine = create_engine(config.DATABASE_URL)
+# Фоновые задачи (compose up, reload) держат соединение десятки секунд, а MySQL
+# закрывает простаивающие по wait_timeout: проверяем и пересоздаём соединения пула.
+# Размер пула ограничен так, чтобы все движки всех воркеров влезали в max_connections
+# MySQL (см. DB_POOL_SIZE в config); при нехватке ждём pool_timeout, а не падаем.
+_ENGINE_OPTIONS = {
+    "pool_pre_ping": True,
+    "pool_recycle": config.DB_POOL_RECYCLE,
+    "pool_size": config.DB_POOL_SIZE,
+    "max_overflow": config.DB_MAX_OVERFLOW,
+    "pool_timeout": config.DB_POOL_TIMEOUT,
+}
+
+engine = create_engine(config.DATABASE_URL, **_ENGINE_OPTIONS)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
-engine_cdr = create_engine(config.DATABASE_CDR_URL)
+engine_cdr = create_engine(config.DATABASE_CDR_URL, **_ENGINE_OPTIONS)
 SessionCDR = sessionmaker(bind=engine_cdr)
 BaseCDR = declarative_base()
 
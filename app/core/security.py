@@ -1,71 +1,402 @@
-from datetime import datetime, timedelta
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from argon2 import PasswordHasher, Type, extract_parameters
+from argon2.exceptions import InvalidHashError, VerificationError, VerifyMismatchError
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+import jwt
+import orjson
 from typing import Any, Optional
 from app.core.config import config
 
-# Явно указываем использование bcrypt_sha256
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+logger = logging.getLogger(__name__)
 
+_ARGON2_HASH_LEN = 16
+_ARGON2_SALT_LEN = 16
+# нижняя граница OWASP для Argon2id: m=46 MiB, t=1, p=1
+_ARGON2_MIN_MEMORY_KIB = 46 * 1024
+
+# argon2-cffi напрямую, без диспетчеризации passlib. Параметры берутся из config
+# (одни на все воркеры) и хранятся в самом хеше, поэтому старые хеши проверяются как есть
+_PH = PasswordHasher(
+    time_cost=config.ARGON2_TIME_COST,
+    memory_cost=config.ARGON2_MEMORY_KIB,
+    parallelism=config.ARGON2_PARALLELISM,
+    hash_len=_ARGON2_HASH_LEN,
+    salt_len=_ARGON2_SALT_LEN,
+    type=Type.ID,
+)
+if config.ARGON2_MEMORY_KIB < _ARGON2_MIN_MEMORY_KIB:
+    logger.warning(
+        "ARGON2_MEMORY_KIB=%d ниже рекомендации OWASP (%d)",
+        config.ARGON2_MEMORY_KIB,
+        _ARGON2_MIN_MEMORY_KIB,
+    )
+
+
+# Пароли длиннее не хешируем: иначе многомегабайтный "пароль" занимает воркер
+_MAX_PW_BYTES = 4096
+
+
+def _password_too_long(password: str) -> bool:
+    # символ UTF-8 — не больше 4 байт, короткие строки не кодируем
+    if len(password) * 4 <= _MAX_PW_BYTES:
+        return False
+    return len(password.encode("utf-8", "ignore")) > _MAX_PW_BYTES
+
+
+def _hash_below_floor(hashed_password: str) -> bool:
+    """Хеш не Argon2id или слабее порога из config (например, старый passlib)."""
+    try:
+        params = extract_parameters(hashed_password)
+    except InvalidHashError:
+        return False
+    return (
+        params.type is not Type.ID
+        or params.memory_cost < config.ARGON2_REHASH_BELOW_MEMORY_KIB
+        or params.time_cost < config.ARGON2_REHASH_BELOW_TIME_COST
+    )
+
+
+def _verify_password(plain_password: str, hashed_password: str) -> tuple[bool, bool]:
+    if _password_too_long(plain_password):
+        return False, False
+    try:
+        _PH.verify(hashed_password, plain_password)
+    except (VerifyMismatchError, VerificationError, InvalidHashError):
+        return False, False
+    return True, _hash_below_floor(hashed_password)
+
+
+def _hash_password(password: str) -> str:
+    if _password_too_long(password):
+        raise ValueError(f"Password is longer than {_MAX_PW_BYTES} bytes")
+    return _PH.hash(password)
+
+
+# argon2-cffi отпускает GIL, поэтому хеши в отдельном пуле идут параллельно
+# и не занимают общий threadpool/event loop. Каждый хеш держит ARGON2_MEMORY_KIB,
+# поэтому число потоков ограничено бюджетом памяти, а не числом ядер. Через пул
+# идут все вызовы Argon2, в том числе синхронные (register, первый вход по LDAP)
+_ARGON2_POOL_SIZE = max(
+    1,
+    min(
+        os.cpu_count() or 1,
+        config.ARGON2_MEMORY_BUDGET_MIB * 1024 // config.ARGON2_MEMORY_KIB,
+    ),
+)
+_ARGON2_POOL = ThreadPoolExecutor(
+    max_workers=_ARGON2_POOL_SIZE, thread_name_prefix="argon2"
+)
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+
+def verify_password(plain_password: str, hashed_password: str) -> tuple[bool, bool]:
+    """(пароль верный, хеш слабее порога и его стоит пересчитать)."""
+    return _ARGON2_POOL.submit(
+        _verify_password, plain_password, hashed_password
+    ).result()
+
+
+async def verify_password_async(
+    plain_password: str, hashed_password: str
+) -> tuple[bool, bool]:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _ARGON2_POOL, _verify_password, plain_password, hashed_password
+    )
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return _ARGON2_POOL.submit(_hash_password, password).result()
+
+
+async def get_password_hash_async(password: str) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_ARGON2_POOL, _hash_password, password)
+
+
+# Ключи, алгоритм и сроки жизни читаются из config один раз при импорте
+_SECRET = config.SECRET_KEY
+_REFRESH_SECRET = config.REFRESH_SECRET_KEY
+# HMAC-ключи в bytes: PyJWT и hmac не перекодируют str на каждый токен
+_SECRET_BYTES = _SECRET.encode("utf-8")
+_REFRESH_SECRET_BYTES = _REFRESH_SECRET.encode("utf-8")
+_ALGORITHM = config.ALGORITHM
+_ALGORITHMS = [config.ALGORITHM]
+_ACCESS_TTL = int(timedelta(minutes=config.ACCESS_TOKEN_EXPIRE_MINUTES).total_seconds())
+_REFRESH_TTL = int(timedelta(days=config.REFRESH_TOKEN_EXPIRE_DAYS).total_seconds())
+
+
+def _load_ed25519_key(path: str) -> Ed25519PrivateKey:
+    with open(path, "rb") as f:
+        key = serialization.load_pem_private_key(f.read(), password=None)
+    if not isinstance(key, Ed25519PrivateKey):
+        raise ValueError(f"{path}: ожидается приватный ключ Ed25519")
+    return key
+
+
+# Ключи подписи/проверки готовыми объектами: PyJWT не разбирает PEM на каждый токен
+if _ALGORITHM == "EdDSA":
+    _ACCESS_SIGN_KEY = _load_ed25519_key(config.ED25519_PRIVATE_KEY_PATH)
+    _REFRESH_SIGN_KEY = _load_ed25519_key(config.ED25519_REFRESH_PRIVATE_KEY_PATH)
+    _ACCESS_VERIFY_KEY = _ACCESS_SIGN_KEY.public_key()
+    _REFRESH_VERIFY_KEY = _REFRESH_SIGN_KEY.public_key()
+else:
+    _ACCESS_SIGN_KEY = _ACCESS_VERIFY_KEY = _SECRET_BYTES
+    _REFRESH_SIGN_KEY = _REFRESH_VERIFY_KEY = _REFRESH_SECRET_BYTES
+
+_HEADERS = {"kid": config.JWT_KEY_ID} if config.JWT_KEY_ID else None
+
+
+def _ttl_seconds(expires_delta: Optional[timedelta], default: int) -> int:
+    return int(expires_delta.total_seconds()) if expires_delta else default
+
+
+def _b64url(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+# Заголовок при фиксированном алгоритме всегда один и тот же — кодируем один раз
+# (те же байты, что даёт PyJWT: компактный JSON, ключи по алфавиту)
+_HEADER_B64 = _b64url(
+    json.dumps(
+        {"alg": _ALGORITHM, "typ": "JWT", **(_HEADERS or {})},
+        separators=(",", ":"),
+        sort_keys=True,
+    ).encode()
+)
+_HS256 = _ALGORITHM == "HS256"
+
+
+class _OrjsonEncoder(json.JSONEncoder):
+    """orjson вместо stdlib json для jwt.encode (ветка не-HS256)."""
+
+    def encode(self, o: Any) -> str:
+        return orjson.dumps(o).decode()
+
+
+class _OrjsonJWT(jwt.PyJWT):
+    """PyJWT с разбором payload через orjson (штатный хук _decode_payload)."""
+
+    def _decode_payload(self, decoded: dict[str, Any]) -> dict[str, Any]:
+        try:
+            payload = orjson.loads(decoded["payload"])
+        except orjson.JSONDecodeError as e:
+            raise jwt.DecodeError(f"Invalid payload string: {e}") from e
+        if not isinstance(payload, dict):
+            raise jwt.DecodeError("Invalid payload string: must be a json object")
+        return payload
+
+
+_JWT = _OrjsonJWT()
+
+# Состояние HMAC с уже разобранным ключом; на каждый токен — дешёвый .copy()
+_HMAC_ACCESS = hmac.new(_SECRET_BYTES, None, hashlib.sha256)
+_HMAC_REFRESH = hmac.new(_REFRESH_SECRET_BYTES, None, hashlib.sha256)
+
+
+def _encode_bytes(payload: dict, key: Any, mac: "hmac.HMAC") -> bytes:
+    if not _HS256:
+        return jwt.encode(
+            payload,
+            key,
+            algorithm=_ALGORITHM,
+            headers=_HEADERS,
+            json_encoder=_OrjsonEncoder,
+        ).encode("ascii")
+    # orjson.dumps сразу отдаёт компактный JSON в bytes
+    signing_input = _HEADER_B64 + b"." + _b64url(orjson.dumps(payload))
+    h = mac.copy()
+    h.update(signing_input)
+    signature = h.digest()
+    return signing_input + b"." + _b64url(signature)
+
+
+def _encode(payload: dict, key: Any, mac: "hmac.HMAC") -> str:
+    return _encode_bytes(payload, key, mac).decode("ascii")
+
+
+def create_access_token_bytes(
+    data: dict, expires_delta: Optional[timedelta] = None
+) -> bytes:
+    """Токен в bytes — для заголовков/кешей, где str не нужен."""
+    # exp — целые секунды эпохи (RFC 7519 NumericDate), без datetime
+    expire = int(time.time()) + _ttl_seconds(expires_delta, _ACCESS_TTL)
+    return _encode_bytes(
+        {**data, "exp": expire, "type": "access"}, _ACCESS_SIGN_KEY, _HMAC_ACCESS
+    )
+
+
+def create_refresh_token_bytes(
+    data: dict, expires_delta: Optional[timedelta] = None
+) -> bytes:
+    expire = int(time.time()) + _ttl_seconds(expires_delta, _REFRESH_TTL)
+    return _encode_bytes(
+        {**data, "exp": expire, "type": "refresh"}, _REFRESH_SIGN_KEY, _HMAC_REFRESH
+    )
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
-    to_encode = data.copy()
-    if expires_delta:
-        expire = datetime.utcnow() + expires_delta
-    else:
-        expire = datetime.utcnow() + timedelta(
-            minutes=config.ACCESS_TOKEN_EXPIRE_MINUTES
-        )
-    to_encode.update({"exp": expire, "type": "access"})
-    encoded_jwt = jwt.encode(to_encode, config.SECRET_KEY, algorithm=config.ALGORITHM)
-    return encoded_jwt
+    return create_access_token_bytes(data, expires_delta).decode("ascii")
 
 
 def create_refresh_token(data: dict, expires_delta: Optional[timedelta] = None):
-    to_encode = data.copy()
-    if expires_delta:
-        expire = datetime.utcnow() + expires_delta
-    else:
-        expire = datetime.utcnow() + timedelta(days=config.REFRESH_TOKEN_EXPIRE_DAYS)
-    to_encode.update({"exp": expire, "type": "refresh"})
-    encoded_jwt = jwt.encode(
-        to_encode, config.REFRESH_SECRET_KEY, algorithm=config.ALGORITHM
-    )
-    return encoded_jwt
+    return create_refresh_token_bytes(data, expires_delta).decode("ascii")
+
+
+_ACCESS_TYPE = b"access"
+_REFRESH_TYPE = b"refresh"
+
+
+# Кеш уже проверенных токенов: токен неизменен до exp, поэтому повторная
+# проверка того же токена не пересчитывает HMAC/JSON. Ошибки не кешируются
+_TOKEN_CACHE_SIZE = 10000
+_token_cache_lock = threading.Lock()
+_access_cache: "OrderedDict[str, dict[str, Any]]" = OrderedDict()
+_refresh_cache: "OrderedDict[str, dict[str, Any]]" = OrderedDict()
+
+
+def _cache_get(cache: OrderedDict, token: str) -> Optional[dict[str, Any]]:
+    with _token_cache_lock:
+        payload = cache.get(token)
+        if payload is None:
+            return None
+        if payload["exp"] <= time.time():
+            del cache[token]
+            return None
+        cache.move_to_end(token)
+    # копия: изменения у вызывающего не должны попадать в кеш
+    return dict(payload)
+
+
+def _cache_put(cache: OrderedDict, token: str, payload: dict[str, Any]) -> None:
+    if not isinstance(payload.get("exp"), (int, float)):
+        return
+    with _token_cache_lock:
+        cache[token] = dict(payload)
+        cache.move_to_end(token)
+        if len(cache) > _TOKEN_CACHE_SIZE:
+            cache.popitem(last=False)
+
+
+def _b64url_decode(data: bytes) -> bytes:
+    return base64.urlsafe_b64decode(data + b"=" * (-len(data) % 4))
+
+
+# Результат _decode_hs256: токен нестандартный, проверять целиком через PyJWT
+_FALLBACK = object()
+# Клеймы, которые PyJWT проверяет по-своему, — их не дублируем
+_PYJWT_CLAIMS = frozenset(("nbf", "iat", "aud", "iss"))
+
+
+def _decode_hs256(token: str, mac: "hmac.HMAC") -> Any:
+    """Проверка своих HS256-токенов (наш заголовок) без PyJWT; None — невалиден."""
+    try:
+        raw = token.encode("ascii")
+    except UnicodeEncodeError:
+        return None
+    parts = raw.split(b".")
+    if len(parts) != 3 or parts[0] != _HEADER_B64:
+        return _FALLBACK
+    header_b64, payload_b64, signature_b64 = parts
+    try:
+        signature = _b64url_decode(signature_b64)
+        h = mac.copy()
+        h.update(header_b64 + b"." + payload_b64)
+        expected = h.digest()
+        # сравнение всегда по длине HMAC и за постоянное время
+        length_ok = len(signature) == len(expected)
+        if not length_ok:
+            signature = bytes(len(expected))
+        if not hmac.compare_digest(signature, expected) or not length_ok:
+            return None
+        payload = orjson.loads(_b64url_decode(payload_b64))
+    except ValueError:
+        return None
+    if not isinstance(payload, dict):
+        return None
+    if not _PYJWT_CLAIMS.isdisjoint(payload):
+        return _FALLBACK
+    # те же правила, что у PyJWT: sub/jti — строки, exp сравнивается как int
+    for claim in ("sub", "jti"):
+        if claim in payload and not isinstance(payload[claim], str):
+            return None
+    if "exp" in payload:
+        exp = payload["exp"]
+        if not isinstance(exp, (int, float)) or int(exp) <= time.time():
+            return None
+    return payload
 
 
 def verify_token(token: str, is_refresh: bool = False) -> Optional[dict[str, Any]]:
+    cache = _refresh_cache if is_refresh else _access_cache
+    cached = _cache_get(cache, token)
+    if cached is not None:
+        return cached
     try:
-        secret_key = config.REFRESH_SECRET_KEY if is_refresh else config.SECRET_KEY
-        payload = jwt.decode(token, secret_key, algorithms=[config.ALGORITHM])
+        payload = _FALLBACK
+        if _HS256:
+            mac = _HMAC_REFRESH if is_refresh else _HMAC_ACCESS
+            payload = _decode_hs256(token, mac)
+            if payload is None:
+                return None
+        if payload is _FALLBACK:
+            verify_key = _REFRESH_VERIFY_KEY if is_refresh else _ACCESS_VERIFY_KEY
+            payload = _JWT.decode(token, verify_key, algorithms=_ALGORITHMS)
 
         token_type = payload.get("type")
-        if is_refresh and token_type != "refresh":
-            return None
-        if not is_refresh and token_type != "access":
+        expected = _REFRESH_TYPE if is_refresh else _ACCESS_TYPE
+        if not isinstance(token_type, str) or not hmac.compare_digest(
+            token_type.encode(), expected
+        ):
             return None
 
+        _cache_put(cache, token, payload)
         return payload
-    except JWTError:
+    except jwt.PyJWTError:
         return None
 
 
-def create_tokens(user_id: int, login: str) -> dict[str, str]:
-    """Создает пару access и refresh токенов"""
-    access_token = create_access_token(data={"user_id": user_id, "login": login})
-    refresh_token = create_refresh_token(data={"user_id": user_id, "login": login})
+def verify_tokens(
+    tokens: list[str], is_refresh: bool = False
+) -> list[Optional[dict[str, Any]]]:
+    """Проверка пачки токенов: повторяющиеся токены проверяются один раз."""
+    results: dict[str, Optional[dict[str, Any]]] = {}
+    for token in tokens:
+        if token not in results:
+            results[token] = verify_token(token, is_refresh=is_refresh)
+    return [results[token] for token in tokens]
+
 
+def create_tokens(user_id: int, login: str) -> dict[str, str]:
+    """Создает пару access и refresh токенов (одно чтение часов на пару)"""
+    now = int(time.time())
+    # по литералу на токен: без копирования и перезаписи ключей
+    access = {
+        "user_id": user_id,
+        "login": login,
+        "exp": now + _ACCESS_TTL,
+        "type": "access",
+    }
+    refresh = {
+        "user_id": user_id,
+        "login": login,
+        "exp": now + _REFRESH_TTL,
+        "type": "refresh",
+    }
     return {
-        "access_token": access_token,
-        "refresh_token": refresh_token,
+        "access_token": _encode(access, _ACCESS_SIGN_KEY, _HMAC_ACCESS),
+        "refresh_token": _encode(refresh, _REFRESH_SIGN_KEY, _HMAC_REFRESH),
         "token_type": "bearer",
     }
 
@@ -1,4 +1,8 @@
+import threading
+from contextlib import asynccontextmanager
+
 from fastapi import Depends, FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.routes import cdr, users, auth, queues, voicemail, dialplan
@@ -8,13 +12,27 @@ from app.routes import logs
 from app.routes import audio_files
 from app.routes.auth import require_auth
 from app.core.config import config
+from app.utils.asterisk_image import warm_asterisk_image
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # прогрев образа в фоне: старт API не ждёт docker build / проверку промптов.
+    # Поток daemon — остановка API не ждёт окончания сборки
+    threading.Thread(
+        target=warm_asterisk_image, name="asterisk-image-warmup", daemon=True
+    ).start()
+    yield
+
 
 # setup_elastic_pipeline()
 app = FastAPI(
+    lifespan=lifespan,
     title="Asterisk Manager",
     docs_url="/docs" if config.DEV_MODE else None,
     redoc_url="/redoc" if config.DEV_MODE else None,
     openapi_url="/openapi.json" if config.DEV_MODE else None,
+    default_response_class=ORJSONResponse,
 )
 _auth_deps = [] if config.DEV_MODE else [Depends(require_auth)]
 if config.DEV_MODE:
@@ -1,10 +1,13 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Index, Integer, String
 from app.core.database import BaseCDR
 from sqlalchemy.orm import Mapped, mapped_column
 
 
 class AsteriskConf(BaseCDR):
     __tablename__ = "ast_config"
+    __table_args__ = (
+        Index("ix_ast_config_instance_id_filename", "instance_id", "filename"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     instance_id: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, Enum, Text, create_engine, ForeignKey
+from sqlalchemy import Column, String, Integer, Enum, Text, create_engine, ForeignKey, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 from app.core.database import BaseCDR
@@ -74,7 +74,7 @@ class PjsipEndpoint(BaseCDR):
     # тут стоит пояснить, что id это скорее просто имя
     # а ключ вводится для того, чтобы удобнее детектить дубликаты номеров
     # по двум полям: username(или id) и reg_server и не вводить составной ключ
-    id = Column(String(40))  # Имя: '101'
+    id = Column(String(40), index=True)  # Имя: '101'
     transport = Column(String(40), default='transport-udp')
  
     # Имя AOR в ps_aors (поле id) = extension (101), нужно для SIP REGISTER To: 101@...
@@ -136,10 +136,16 @@ class PjsipAuth(BaseCDR):
 class PjsipAor(BaseCDR):
     """Настройки регистрации (Address of Record)"""
     __tablename__ = 'ps_aors'
+    __table_args__ = (
+        Index("uq_ps_aors_reg_server_id", "reg_server", "id", unique=True),
+    )
 
     pk = Column(Integer, primary_key=True, autoincrement=True)
 
     id = Column(String(40), primary_key=True)  # Например: '101-aor'
+    # имя АТС (asterisk_instances.name), а не integer FK: ps_* живут в базе cdr,
+    # asterisk_instances — в основной, FK между базами невозможен; по этому же
+    # полю фильтруют VIEW для Asterisk realtime (pjsip_views)
     reg_server = Column(String(60), nullable=True) # container name
     max_contacts = Column(Integer, default=1)
     remove_existing = Column(Enum(Choise), default=Choise.YES)
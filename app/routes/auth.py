@@ -1,13 +1,19 @@
+import logging
+
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from sqlalchemy import exists
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 
 from app.models.user import User
 from app.schemas.auth import TokenRefresh, UserLogin, UserRegister, Token
 from app.schemas.user import UserResponse
 from app.core.security import (
-    verify_password,
+    verify_password_async,
     get_password_hash,
+    get_password_hash_async,
     create_tokens,
     verify_token,
     # create_LDAP_tokens,
@@ -16,6 +22,8 @@ from app.core.config import config
 from app.core.database import get_db
 from app.core.ldap_auth import ldap_auth
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/auth", tags=["auth"])
 security = HTTPBearer()
 optional_security = HTTPBearer(auto_error=False)
@@ -74,13 +82,16 @@ def register(user_data: UserRegister, db: Session = Depends(get_db)):
             detail="Registration is disabled in production",
         )
 
-    existing_user = db.query(User).filter(User.login == user_data.login).first()
-    if existing_user:
+    login_taken = db.query(exists().where(User.login == user_data.login)).scalar()
+    if login_taken:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Login already registered"
         )
 
-    hashed_password = get_password_hash(user_data.password)
+    try:
+        hashed_password = get_password_hash(user_data.password)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     user = User(
         login=user_data.login,
         password_hash=hashed_password,
@@ -94,18 +105,49 @@ def register(user_data: UserRegister, db: Session = Depends(get_db)):
     return user
 
 
+def _find_user_by_login(db: Session, login: str) -> User | None:
+    return db.query(User).filter(User.login == login).first()
+
+
+def _store_password_hash(db: Session, user: User, password_hash: str) -> None:
+    # ошибка записи не должна ломать успешный вход
+    user.password_hash = password_hash
+    try:
+        db.commit()
+    except SQLAlchemyError:
+        db.rollback()
+        logger.exception("Не удалось обновить хеш пароля пользователя %s", user.id)
+
+
 @router.post("/login", response_model=Token)
-def login(user_data: UserLogin, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.login == user_data.login).first()
-    if not user or not verify_password(user_data.password, user.password_hash):
+async def login(user_data: UserLogin, db: Session = Depends(get_db)):
+    # Запросы к БД синхронные — в threadpool, чтобы не держать event loop;
+    # Argon2 — в своём пуле
+    user = await run_in_threadpool(_find_user_by_login, db, user_data.login)
+    if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect login or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    user_id, login = user.id, user.login
+    ok, needs_rehash = await verify_password_async(
+        user_data.password, user.password_hash
+    )
+    if not ok:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect login or password",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    # Хеш слабее порога (например, passlib) — пересчитываем при входе
+    if needs_rehash:
+        password_hash = await get_password_hash_async(user_data.password)
+        await run_in_threadpool(_store_password_hash, db, user, password_hash)
 
     # Создаем пару токенов
-    tokens = create_tokens(user_id=user.id, login=user.login)
+    tokens = create_tokens(user_id=user_id, login=login)
 
     return tokens
 
@@ -122,7 +164,12 @@ def login_LDAP(user_data: UserLogin, db: Session = Depends(get_db)):
     print(ldap_user)
     user = db.query(User).filter(User.login == user_data.login).first()
     if not user:
-        hashed_password = get_password_hash(user_data.password)
+        try:
+            hashed_password = get_password_hash(user_data.password)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)
+            )
         user = User(
             login=user_data.login,
             password_hash=hashed_password,
@@ -158,13 +205,15 @@ def refresh_token(token_data: TokenRefresh, db: Session = Depends(get_db)):
     if user_id is None or login is None:
         raise credentials_exception
 
-    # Проверяем, существует ли пользователь
-    user = db.query(User).filter(User.id == user_id, User.login == login).first()
-    if user is None:
+    # Проверяем, существует ли пользователь (сама строка не нужна)
+    user_exists = db.query(
+        exists().where(User.id == user_id, User.login == login)
+    ).scalar()
+    if not user_exists:
         raise credentials_exception
 
     # Создаем новую пару токенов
-    tokens = create_tokens(user_id=user.id, login=user.login)
+    tokens = create_tokens(user_id=user_id, login=login)
 
     return tokens
 
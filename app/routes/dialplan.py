@@ -12,7 +12,7 @@ from app.schemas.dialplan import (
     DialplanUpdate,
 )
 from app.services.ast_config_history import save_file_version
-from app.services.asterisk_reload import AsteriskReloadError, reload_asterisk_config
+from app.services.asterisk_reload import AsteriskReloadError, reload_asterisk_config_async
 
 
 router = APIRouter(prefix="/instances/{instance_id}/dialplan")
@@ -179,7 +179,7 @@ async def update_dialplan_context(
         reload_message = ""
         if dialplan_update.reload_asterisk:
             try:
-                reload_asterisk_config(str(instance.name))
+                await reload_asterisk_config_async(str(instance.name))
                 reload_message = "; Asterisk reloaded"
             except AsteriskReloadError as e:
                 reload_message = f"; Asterisk reload failed: {e.message}"
@@ -263,7 +263,7 @@ async def update_dialplan(
         reload_message = ""
         if dialplan_update.reload_asterisk:
             try:
-                reload_asterisk_config(str(instance.name))
+                await reload_asterisk_config_async(str(instance.name))
                 reload_message = "; Asterisk reloaded"
             except AsteriskReloadError as e:
                 reload_message = f"; Asterisk reload failed: {e.message}"
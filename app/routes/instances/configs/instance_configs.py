@@ -21,7 +21,7 @@ from app.services.ast_config_history import (
     rollback_to_version,
     save_file_version,
 )
-from app.services.asterisk_reload import AsteriskReloadError, reload_asterisk_config
+from app.services.asterisk_reload import AsteriskReloadError, reload_asterisk_config_async
 from app.utils.ast_config_ini import (
     STATIC_REALTIME_CONF_FILES,
     replace_config_from_ini,
@@ -210,7 +210,7 @@ async def rollback_config(
     reload_message = ""
     if body.reload_asterisk:
         try:
-            reload_asterisk_config(instance.name)
+            await reload_asterisk_config_async(instance.name)
             reload_message = "; Asterisk reloaded"
         except AsteriskReloadError as e:
             reload_message = f"; Asterisk reload failed: {e.message}"
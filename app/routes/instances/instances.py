@@ -12,8 +12,8 @@ from sqlalchemy import text
 
 from app.services.asterisk_reload import (
     AsteriskReloadError,
-    reload_asterisk_config,
-    run_asterisk_cli,
+    reload_asterisk_config_async,
+    run_asterisk_cli_async,
 )
 from app.services.pjsip_schema import ensure_pjsip_schema
 from app.services.voicemail_modules import ensure_voicemail_modules
@@ -60,7 +60,7 @@ async def reload_instance(
         from app.utils.asterisk_sounds import ensure_astsoundsdir_on_disk
 
         sounds_conf_fixed = ensure_astsoundsdir_on_disk(instance)
-        reload_asterisk_config(instance.name)
+        await reload_asterisk_config_async(instance.name)
         msg = "Configuration reloaded successfully (core + manager)"
         if sounds_conf_fixed:
             msg += "; astsoundsdir => /opt/asterisk-core-sounds in asterisk.conf"
@@ -107,7 +107,7 @@ async def seed_test_dialplan(
     dialplan_fixed = repair_internal_dialplan(db_cdr, instance_id)
     media_fixed = repair_queue_and_moh(db_cdr, instance_id)
     try:
-        reload_asterisk_config(instance.name)
+        await reload_asterisk_config_async(instance.name)
     except AsteriskReloadError as e:
         raise HTTPException(status_code=500, detail=e.message) from e
 
@@ -160,7 +160,7 @@ async def seed_test_users(
     sync_pjsip_views_for_instance(db, db_cdr, instance)
     write_pjsip_users_conf(instance, db_cdr)
     try:
-        reload_asterisk_config(instance.name)
+        await reload_asterisk_config_async(instance.name)
     except AsteriskReloadError as e:
         raise HTTPException(status_code=500, detail=e.message) from e
 
@@ -184,14 +184,12 @@ async def rebuild_asterisk_image(
     if not instance:
         raise HTTPException(status_code=404, detail="Instance not found")
     try:
-        import docker
-
         from app.utils.asterisk_image import (
             ensure_asterisk_image,
             image_has_voicemail_sounds,
         )
 
-        ensure_asterisk_image(docker.from_env(), force_rebuild=True)
+        ensure_asterisk_image(force_rebuild=True)
         has_sounds = image_has_voicemail_sounds()
         from app.core.config import config
 
@@ -236,7 +234,7 @@ async def recreate_container(
         volume_path = recreate_asterisk_container(
             instance, db, force_rebuild_image=rebuild_image
         )
-        reload_asterisk_config(instance.name)
+        await reload_asterisk_config_async(instance.name)
         mount = verify_instance_config_mount(instance)
         msg = f"{msg_extra}Container recreated"
         if rebuild_image:
@@ -311,7 +309,7 @@ async def pjsip_diagnose(
         cli_commands.append(f"pjsip show aor {ep['aors']}")
     for cmd in cli_commands:
         try:
-            result = run_asterisk_cli(instance.name, cmd, strict=False)
+            result = await run_asterisk_cli_async(instance.name, cmd, strict=False)
             cli[cmd] = (result.stdout or result.stderr or "").strip()
         except AsteriskReloadError as e:
             cli_errors[cmd] = e.message
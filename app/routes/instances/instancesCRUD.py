@@ -1,6 +1,7 @@
 import asyncio
 
 import os
+from concurrent.futures import ThreadPoolExecutor
 import shutil
 import subprocess
 from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
@@ -36,9 +37,9 @@ from app.services.filebeat_config import write_filebeat_config
 from app.services.instance_container import run_asterisk_container
 from app.services.instance_runtime import apply_instance_ports_runtime
 from app.utils.instance_paths import (
+    config_dir_for_name,
     docker_volume_config_dir,
     writable_config_dir,
-    writable_config_dir_for_name,
 )
 
 # from app.models.sip_user import SIPUser
@@ -49,11 +50,35 @@ from app.schemas.asterisk import (
     ChangeCDRStatus,
     CDRState,
 )
+from sqlalchemy import or_, select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from panoramisk import Manager, Message
 
 router = APIRouter(prefix="/instances")
 
+# unique-индексы asterisk_instances (migrations/versions/main/0001_initial.py)
+_UNIQUE_INDEX_DETAILS = {
+    "ix_asterisk_instances_name": "Instance name already exists",
+    "ix_asterisk_instances_sip_port": "Ports already in use",
+    "ix_asterisk_instances_http_port": "Ports already in use",
+    "ix_asterisk_instances_rtp_port_start": "Ports already in use",
+    "ix_asterisk_instances_rtp_port_end": "Ports already in use",
+    "ix_asterisk_instances_ami_port": "Ports already in use",
+}
+
+
+_INSTANCE_RESPONSE_FIELDS = tuple(AsteriskInstanceResponse.model_fields)
+
+
+def _integrity_error_detail(error: IntegrityError) -> str:
+    """Текст ошибки по имени нарушенного unique-индекса (MySQL 1062)."""
+    message = str(error.orig)
+    for index_name, detail in _UNIQUE_INDEX_DETAILS.items():
+        if f"{index_name}'" in message:
+            return detail
+    return "Instance name or ports already in use"
+
 
 async def unload_module(
     modlue: str, instance_name: str, db: SessionLocal = Depends(get_db)
@@ -171,15 +196,17 @@ async def send_comand_route(
 
 @router.get("/", response_model=list[AsteriskInstanceResponse])
 def list_instances(db: SessionLocal = Depends(get_db)):
-    return db.query(AsteriskInstance).all()
+    # только колонки ответа: без ORM-объектов и identity map на каждую строку
+    rows = db.execute(
+        select(*(getattr(AsteriskInstance, f) for f in _INSTANCE_RESPONSE_FIELDS))
+    ).mappings()
+    return [dict(row) for row in rows]
 
 
 @router.get("/{instance_id}", response_model=AsteriskInstanceResponse)
 async def get_instance(instance_id: int, db: Session = Depends(get_db)):
     """Получение информации о конкретном экземпляре"""
-    instance = (
-        db.query(AsteriskInstance).filter(AsteriskInstance.id == instance_id).first()
-    )
+    instance = db.get(AsteriskInstance, instance_id)
     if not instance:
         raise HTTPException(status_code=404, detail="Instance not found")
     return instance
@@ -194,57 +221,31 @@ async def create_instance(
     db_cdr: Session = Depends(get_cdr_db),
 ):
     """Создание нового экземпляра Asterisk"""
-    # Check if instance name already exists
-    if (
-        db.query(AsteriskInstance)
-        .filter(AsteriskInstance.name == instance.name)
-        .first()
-    ):
-        raise HTTPException(status_code=400, detail="Instance name already exists")
-
-    # Check port conflicts
-    if (
-        db.query(AsteriskInstance)
-        .filter(
-            (AsteriskInstance.sip_port == instance.sip_port)
-            | (AsteriskInstance.http_port == instance.http_port)
-            | (AsteriskInstance.rtp_port_start == instance.rtp_port_start)
-            | (AsteriskInstance.rtp_port_end == instance.rtp_port_end)
-            | (AsteriskInstance.ami_port == instance.ami_port)
-        )
-        .first()
-    ):
-        raise HTTPException(status_code=400, detail="Ports already in use")
-
-    # Create config directory
-    config_dir = writable_config_dir_for_name(instance.name)
-    os.chmod(config_dir, 0o777)
-
-    os.makedirs(f"{config_dir}/drivers", exist_ok=True)
-    os.chmod(f"{config_dir}/drivers", 0o777)
-
-    os.makedirs(f"{config_dir}/asterisk_logs", exist_ok=True)
-    os.chmod(f"{config_dir}/asterisk_logs", 0o777)
-
-    db_instance = None
+    # Уникальность name и портов обеспечивают unique-индексы asterisk_instances:
+    # вставляем запись до работы с диском, чтобы конфликт не задел чужой каталог.
+    config_dir = config_dir_for_name(instance.name)
+    transport_type = instance.transport_type.value
+    db_instance = AsteriskInstance(
+        name=instance.name,
+        sip_port=instance.sip_port,
+        http_port=instance.http_port,
+        rtp_port_start=instance.rtp_port_start,
+        rtp_port_end=instance.rtp_port_end,
+        ami_port=instance.ami_port,
+        config_path=config_dir,
+        status="creating",
+    )
+    db.add(db_instance)
     try:
-        transport_type = instance.transport_type.value
-        db_instance = AsteriskInstance(
-            name=instance.name,
-            sip_port=instance.sip_port,
-            http_port=instance.http_port,
-            rtp_port_start=instance.rtp_port_start,
-            rtp_port_end=instance.rtp_port_end,
-            ami_port=instance.ami_port,
-            config_path=config_dir,
-            status="creating",
-        )
-        db.add(db_instance)
         db.commit()
-        db.refresh(db_instance)
+    except IntegrityError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=_integrity_error_detail(e))
+    db.refresh(db_instance)
 
+    try:
         try:
-            create_default_configs(
+            await create_default_configs(
                 config_dir,
                 instance,
                 transport_type,
@@ -305,21 +306,6 @@ async def update_instance(
     db_cdr: Session = Depends(get_cdr_db),
 ):
     """Обновление экземпляра Asterisk"""
-    instance = (
-        db.query(AsteriskInstance).filter(AsteriskInstance.id == instance_id).first()
-    )
-    if not instance:
-        raise HTTPException(status_code=404, detail="Instance not found")
-
-    if instance_update.name and instance_update.name != instance.name:
-        existing_instance = (
-            db.query(AsteriskInstance)
-            .filter(AsteriskInstance.name == instance_update.name)
-            .first()
-        )
-        if existing_instance:
-            raise HTTPException(status_code=400, detail="Instance name already exists")
-
     update_data = instance_update.model_dump(exclude_unset=True)
     change_author = update_data.pop("change_author", None)
     update_data.pop("ami_port", None)
@@ -350,18 +336,50 @@ async def update_instance(
         else None
     )
 
-    if new_http_port is not None and new_http_port != instance.http_port:
-        existing_http_port = (
-            db.query(AsteriskInstance)
-            .filter(
-                AsteriskInstance.http_port == new_http_port,
-                AsteriskInstance.id != instance_id,
-            )
-            .first()
+    unique_changes = [
+        (AsteriskInstance.name, update_data.get("name"), "Instance name already exists"),
+        (AsteriskInstance.sip_port, update_data.get("sip_port"), "SIP port already in use"),
+        (AsteriskInstance.http_port, new_http_port, "HTTP port already in use"),
+        (AsteriskInstance.ami_port, new_ami_port, "AMI port already in use"),
+        (AsteriskInstance.rtp_port_start, new_rtp_start, "RTP start port already in use"),
+        (AsteriskInstance.rtp_port_end, new_rtp_end, "RTP end port already in use"),
+    ]
+    unique_changes = [change for change in unique_changes if change[1] is not None]
+
+    # Один запрос: сам инстанс + все строки, конфликтующие по новым значениям.
+    # Совпадение по каждой колонке считает MySQL (с его collation: "PBX" = "pbx"),
+    # а не сравнение в Python
+    conflicts = [column == value for column, value, _ in unique_changes]
+    rows = db.execute(
+        select(AsteriskInstance, *conflicts).where(
+            or_(AsteriskInstance.id == instance_id, *conflicts)
         )
-        if existing_http_port:
-            raise HTTPException(status_code=400, detail="HTTP port already in use")
+    ).all()
+    instance = next((row[0] for row in rows if row[0].id == instance_id), None)
+    if not instance:
+        raise HTTPException(status_code=404, detail="Instance not found")
 
+    effective_rtp_start = (
+        new_rtp_start if new_rtp_start is not None else instance.rtp_port_start
+    )
+    effective_rtp_end = (
+        new_rtp_end if new_rtp_end is not None else instance.rtp_port_end
+    )
+    if new_rtp_start is not None or new_rtp_end is not None:
+        if effective_rtp_start >= effective_rtp_end:
+            raise HTTPException(
+                status_code=400,
+                detail="rtp_port_start must be less than rtp_port_end",
+            )
+
+    # Проверки уникальности — до изменений в БД и ast_config
+    for i, (column, value, detail) in enumerate(unique_changes, start=1):
+        if value == getattr(instance, column.key):
+            continue
+        if any(row[i] for row in rows if row[0].id != instance_id):
+            raise HTTPException(status_code=400, detail=detail)
+
+    if new_http_port is not None and new_http_port != instance.http_port:
         try:
             apply_http_port_change(
                 db_cdr,
@@ -377,17 +395,6 @@ async def update_instance(
         ports_runtime_needed = True
 
     if new_ami_port is not None and new_ami_port != instance.ami_port:
-        existing_ami_port = (
-            db.query(AsteriskInstance)
-            .filter(
-                AsteriskInstance.ami_port == new_ami_port,
-                AsteriskInstance.id != instance_id,
-            )
-            .first()
-        )
-        if existing_ami_port:
-            raise HTTPException(status_code=400, detail="AMI port already in use")
-
         try:
             apply_manager_ami_port_change(
                 db_cdr,
@@ -402,78 +409,43 @@ async def update_instance(
         instance.ami_port = new_ami_port
         ports_runtime_needed = True
 
-    effective_rtp_start = (
-        new_rtp_start if new_rtp_start is not None else instance.rtp_port_start
-    )
-    effective_rtp_end = (
-        new_rtp_end if new_rtp_end is not None else instance.rtp_port_end
-    )
-
-    if new_rtp_start is not None or new_rtp_end is not None:
-        if effective_rtp_start >= effective_rtp_end:
-            raise HTTPException(
-                status_code=400,
-                detail="rtp_port_start must be less than rtp_port_end",
+    if (
+        effective_rtp_start != instance.rtp_port_start
+        or effective_rtp_end != instance.rtp_port_end
+    ):
+        try:
+            apply_rtp_ports_change(
+                db_cdr,
+                instance_id=instance_id,
+                old_rtp_start=instance.rtp_port_start,
+                old_rtp_end=instance.rtp_port_end,
+                new_rtp_start=effective_rtp_start,
+                new_rtp_end=effective_rtp_end,
+                author=author,
             )
+        except ValueError as e:
+            raise HTTPException(status_code=500, detail=str(e))
 
-        if (
-            effective_rtp_start != instance.rtp_port_start
-            or effective_rtp_end != instance.rtp_port_end
-        ):
-            if new_rtp_start is not None and new_rtp_start != instance.rtp_port_start:
-                conflict = (
-                    db.query(AsteriskInstance)
-                    .filter(
-                        AsteriskInstance.rtp_port_start == new_rtp_start,
-                        AsteriskInstance.id != instance_id,
-                    )
-                    .first()
-                )
-                if conflict:
-                    raise HTTPException(
-                        status_code=400, detail="RTP start port already in use"
-                    )
-            if new_rtp_end is not None and new_rtp_end != instance.rtp_port_end:
-                conflict = (
-                    db.query(AsteriskInstance)
-                    .filter(
-                        AsteriskInstance.rtp_port_end == new_rtp_end,
-                        AsteriskInstance.id != instance_id,
-                    )
-                    .first()
-                )
-                if conflict:
-                    raise HTTPException(
-                        status_code=400, detail="RTP end port already in use"
-                    )
-
-            try:
-                apply_rtp_ports_change(
-                    db_cdr,
-                    instance_id=instance_id,
-                    old_rtp_start=instance.rtp_port_start,
-                    old_rtp_end=instance.rtp_port_end,
-                    new_rtp_start=effective_rtp_start,
-                    new_rtp_end=effective_rtp_end,
-                    author=author,
-                )
-            except ValueError as e:
-                raise HTTPException(status_code=500, detail=str(e))
-
-            instance.rtp_port_start = effective_rtp_start
-            instance.rtp_port_end = effective_rtp_end
-            ports_runtime_needed = True
+        instance.rtp_port_start = effective_rtp_start
+        instance.rtp_port_end = effective_rtp_end
+        ports_runtime_needed = True
 
     for field, value in update_data.items():
         setattr(instance, field, value)
 
-    db.commit()
-    db.refresh(instance)
+    # ответ собираем до commit: все поля уже в памяти, refresh-SELECT не нужен
+    # (MySQL не поддерживает UPDATE ... RETURNING)
+    response = AsteriskInstanceResponse.model_validate(instance)
+    try:
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=_integrity_error_detail(e))
 
     if ports_runtime_needed:
         background_tasks.add_task(apply_instance_ports_runtime, instance_id)
 
-    return instance
+    return response
 
 
 @router.delete("/{instance_id}")
@@ -482,20 +454,22 @@ def delete_instance(
     db: Session = Depends(get_db),
     db_cdr: Session = Depends(get_cdr_db),
 ):
-    instance = (
-        db.query(AsteriskInstance).filter(AsteriskInstance.id == instance_id).first()
-    )
+    instance = db.get(AsteriskInstance, instance_id)
     if not instance:
         raise HTTPException(status_code=404, detail="Instance not found")
 
     try:
         # Stop and remove container
-        from app.services.instance_compose import compose_cli, compose_workdir
+        from app.services.instance_compose import (
+            compose_cli,
+            compose_filename,
+            compose_workdir,
+        )
 
         compose_path = compose_workdir()
-        filename = f"docker-compose-{instance.name}.yml"
-        # Проверяем существование директории docker-compose перед удалением
-        if os.path.exists(compose_path):
+        filename = compose_filename(instance.name)
+        # stat на Ceph/NFS — RTT: каталог compose проверяем один раз, только для down
+        if os.path.isdir(compose_path):
             result = subprocess.run(
                 compose_cli(instance.name, "down", "-v"),
                 cwd=compose_path,
@@ -514,31 +488,27 @@ def delete_instance(
             # Если config_path начинается с ceph://, пропускаем удаление файлов
             if config_path.startswith("ceph://"):
                 print(f"Skipping filesystem cleanup for Ceph path: {config_path}")
-            elif os.path.exists(config_path):
+            else:
+                # без предварительного exists: отсутствие каталога — это FileNotFoundError
                 try:
                     shutil.rmtree(config_path)
                     print(f"Config directory removed: {config_path}")
                 except FileNotFoundError:
-                    print(f"Config directory already deleted: {config_path}")
+                    print(f"Config directory not found: {config_path}")
                 except Exception as e:
                     print(
                         f"Warning: Could not remove config directory {config_path}: {e}"
                     )
-            else:
-                print(f"Config directory not found: {config_path}")
 
         # Cleanup compose directory with error handling
-        if os.path.exists(compose_path):
-            try:
-                os.remove(f"{compose_path}/{filename}")
-                # shutil.rmtree(compose_path)
-                print(f"Compose file removed: {filename}")
-            except FileNotFoundError:
-                print(f"Compose file already deleted: {filename}")
-            except Exception as e:
-                print(f"Warning: Could not remove compose file {filename}: {e}")
-        else:
+        try:
+            os.remove(os.path.join(compose_path, filename))
+            # shutil.rmtree(compose_path)
+            print(f"Compose file removed: {filename}")
+        except FileNotFoundError:
             print(f"Compose file not found: {filename}")
+        except Exception as e:
+            print(f"Warning: Could not remove compose file {filename}: {e}")
 
         delete_ast_config_for_instance(db_cdr, instance_id)
         drop_ast_config_view(db_cdr, instance_id)
@@ -560,52 +530,111 @@ def delete_instance(
         raise HTTPException(status_code=500, detail=f"Error during deletion: {str(e)}")
 
 
-def create_default_configs(
+def _create_config_dirs(config_dir: str) -> None:
+    """Каталог конфигов с drivers/ и asterisk_logs/, доступные контейнеру (0o777)."""
+    os.makedirs(config_dir, exist_ok=True)
+    paths = (config_dir, f"{config_dir}/drivers", f"{config_dir}/asterisk_logs")
+    for path in paths[1:]:
+        # родитель уже есть — достаточно одного mkdir без обхода пути
+        try:
+            os.mkdir(path)
+        except FileExistsError:
+            pass
+    # mode в mkdir урезается umask процесса, поэтому права выставляем явно
+    for path in paths:
+        os.chmod(path, 0o777)
+
+
+def _seed_db_configs(
+    db_cdr: Session,
+    instance_id: int,
+    configs: dict[str, str],
+) -> None:
+    for filename, content in configs.items():
+        seed_config_from_ini(db_cdr, instance_id, filename, content)
+    db_cdr.commit()
+
+
+def _write_config_file(item: tuple[str, bytes]) -> None:
+    """Один файл конфига: open/write/fchmod/fchown по одному дескриптору."""
+    filepath, data = item
+    fd = os.open(filepath, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o777)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+        # режим из os.open режется umask, поэтому права выставляем явно
+        os.fchmod(fd, 0o777)
+        os.fchown(fd, config.ASTERISK_UID, config.ASTERISK_GID)
+    finally:
+        os.close(fd)
+
+
+def _write_disk_configs(
+    config_dir: str,
+    configs: dict[str, str],
+    instance_name: str,
+) -> None:
+    _create_config_dirs(config_dir)
+    files = [
+        (os.path.join(config_dir, filename), content.encode("utf-8"))
+        for filename, content in configs.items()
+    ]
+    # файлы независимы: пишем параллельно, чтобы задержки ФС перекрывались
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(_write_config_file, files))
+    print(f"Конфиги созданы в {config_dir}")
+    write_filebeat_config(instance_name)
+
+
+async def create_default_configs(
     config_dir: str,
     instance: AsteriskInstanceCreate,
     transport_type: str,
     db_cdr: Session,
     instance_id: int,
 ):
-    """Сидирует конфиги в ast_config и пишет на диск только bootstrap-файлы."""
-
-    for filename, content in get_db_config_templates(instance, transport_type).items():
-        seed_config_from_ini(db_cdr, instance_id, filename, content)
-    db_cdr.commit()
+    """Сидирует конфиги в ast_config и пишет на диск только bootstrap-файлы.
 
+    Сидирование в БД и запись на диск независимы и идут параллельно в потоках;
+    db_cdr используется только потоком сидирования.
+    """
     disk_configs = get_disk_config_templates(instance, transport_type)
     disk_configs["extconfig.conf"] = build_extconfig_conf(instance_id)
 
-    for filename, content in disk_configs.items():
-        filepath = os.path.join(config_dir, filename)
-        with open(filepath, "w", encoding="utf-8") as f:
-            f.write(content)
-        # Устанавливаем правильные права
-        os.chmod(filepath, 0o777)
-        os.chown(filepath, config.ASTERISK_UID, config.ASTERISK_GID)
-        # try:
-        #     os.chown(filepath, 0, 0)
-        # except PermissionError:
-        #     # Если нет прав на смену владельца, используем sudo
-        #     subprocess.run(['sudo', 'chown', f'{0}:{0}', filepath])
-    # os.chmod(config_dir, 0o777)
-    print(f"Конфиги созданы в {config_dir}")
-    write_filebeat_config(instance.name)
+    results = await asyncio.gather(
+        asyncio.to_thread(
+            _seed_db_configs,
+            db_cdr,
+            instance_id,
+            get_db_config_templates(instance, transport_type),
+        ),
+        asyncio.to_thread(_write_disk_configs, config_dir, disk_configs, instance.name),
+        return_exceptions=True,
+    )
+    # ждём обе ветки: откат в create_instance не должен идти параллельно с записью
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
 
 
 def _start_asterisk_container_task(instance_id: int) -> None:
-    db = SessionLocal()
-    try:
-        instance = (
-            db.query(AsteriskInstance)
-            .filter(AsteriskInstance.id == instance_id)
-            .first()
+    """Фоновая задача: строка читается короткой сессией, docker-работа (минуты)
+    идёт без соединения из пула, статус пишется отдельной короткой сессией."""
+    with SessionLocal() as db:
+        instance = db.get(AsteriskInstance, instance_id)
+    if instance is None:
+        return
+
+    status = start_asterisk_container(instance)
+
+    with SessionLocal() as db:
+        db.execute(
+            update(AsteriskInstance)
+            .where(AsteriskInstance.id == instance_id)
+            .values(status=status)
         )
-        if instance is None:
-            return
-        start_asterisk_container(instance, db)
-    finally:
-        db.close()
+        db.commit()
 
 
 def start_asterisk_container_by_library(instance: AsteriskInstance, db: Session):
@@ -656,23 +685,20 @@ def start_asterisk_container_by_library(instance: AsteriskInstance, db: Session)
     #     db.commit()
 
 
-def start_asterisk_container(instance: AsteriskInstance, db: Session):
-    """Запуск asterisk + filebeat с volume {HOST_PROJECT_PATH}/asterisk_configs/{name}."""
-    from app.services.instance_compose import stop_instance_stack
+def start_asterisk_container(instance: AsteriskInstance) -> str:
+    """Запуск asterisk + filebeat с volume {HOST_PROJECT_PATH}/asterisk_configs/{name}.
+
+    БД не трогает: возвращает статус ("running"/"error") для записи вызывающим.
+    """
+    from app.services.instance_compose import stop_instance_stack, sync_instance_compose
 
     config_dir = docker_volume_config_dir(instance)
-    print(f"Проверка конфигов в {config_dir}:")
-    if os.path.isdir(config_dir):
-        for file in os.listdir(config_dir):
-            filepath = os.path.join(config_dir, file)
-            if os.path.isfile(filepath):
-                print(f"  {file} - {os.path.getsize(filepath)} bytes")
 
     try:
         stop_instance_stack(instance)
-        run_asterisk_container(instance, db)
+        sync_instance_compose(instance)
         print(f"Контейнер {instance.name} запущен, volume {config_dir}:/etc/asterisk")
+        return "running"
     except Exception as e:
-        instance.status = "error"
-        db.commit()
         print(f"Ошибка запуска: {e}")
+        return "error"
@@ -7,11 +7,13 @@ from fastapi import APIRouter, Depends, HTTPException, status, Path
 from app.core.database import get_db, get_cdr_db
 from app.models.asterisk_instance import AsteriskInstance
 from app.models.sip_user import PjsipEndpoint, PjsipAor, PjsipAuth
-from app.services.pjsip_disk_sync import _format_callerid, write_pjsip_users_conf
+from app.services.pjsip_disk_sync import _format_callerid, schedule_pjsip_users_conf_write
 from app.services.voicemail_config import create_voicemail_box, mailbox_exists
 from app.schemas.voicemail import VoicemailCreate
 # from app.schemas.asterisk import SIPUserCreate, SIPUserResponse, SIPUserUpdate
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, contains_eager, joinedload
 from app.schemas.sip import (
     SIPUserCreate,
     AuthSchema,
@@ -25,6 +27,19 @@ from app.schemas.sip import (
 
 router = APIRouter(prefix="/instances/{instance_id}/users")
 
+# unique-индекс ps_aors: один номер на инстанс (cdr 0003)
+_AOR_UNIQUE_INDEX = "uq_ps_aors_reg_server_id"
+
+
+def _instance_name(db: Session, instance_id: int) -> str:
+    """Имя АТС по id: только колонка name, без загрузки всей строки."""
+    name = db.scalar(
+        select(AsteriskInstance.name).where(AsteriskInstance.id == instance_id)
+    )
+    if name is None:
+        raise HTTPException(status_code=400, detail="instance does not exists")
+    return name
+
 
 @router.post("/")
 def create_sip_user(
@@ -33,7 +48,6 @@ def create_sip_user(
     db: Session = Depends(get_db),
     cdr_db: Session = Depends(get_cdr_db),
 ):
-    # Проверяем, нет ли уже такого пользователя
     instance = (
         db.query(AsteriskInstance).filter(AsteriskInstance.id == instance_id).first()
     )
@@ -50,17 +64,6 @@ def create_sip_user(
     #     .filter(PjsipAor.reg_server == instance.name)\
     #     .filter()\
     #     .first()
-    existing = (
-        cdr_db.query(PjsipEndpoint)
-        .options(joinedload(PjsipEndpoint.aors_fk), joinedload(PjsipEndpoint.auths_fk))
-        .join(PjsipAor, PjsipEndpoint.aors_id == PjsipAor.pk)
-        .filter(PjsipAor.reg_server == instance.name)
-        .filter(PjsipEndpoint.id == user_data.username)
-        .first()
-    )
-    if existing:
-        raise HTTPException(status_code=400, detail="User already exists")
-
     try:
         # 1. Создаем AOR (регистрация)
         new_aor = PjsipAor(
@@ -77,6 +80,7 @@ def create_sip_user(
         )
         cdr_db.add(new_aor)
         cdr_db.add(new_auth)
+        # дубль номера отсекает unique-индекс (reg_server, id) на ps_aors
         cdr_db.flush()
         # 3. Создаем Endpoint (логика)
         new_endpoint = PjsipEndpoint(
@@ -111,7 +115,7 @@ def create_sip_user(
             new_endpoint.mailboxes = f"{user_data.username}@default"
             cdr_db.commit()
 
-        write_pjsip_users_conf(instance, cdr_db)
+        schedule_pjsip_users_conf_write(instance_id)
 
         return {
             "status": "success",
@@ -120,6 +124,13 @@ def create_sip_user(
             "voicemail_pin": "4242",
         }
 
+    except IntegrityError as e:
+        cdr_db.rollback()
+        if f"{_AOR_UNIQUE_INDEX}'" in str(e.orig):
+            raise HTTPException(status_code=400, detail="User already exists")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)
+        )
     except Exception as e:
         db.rollback()
         raise HTTPException(
@@ -134,17 +145,13 @@ async def get_sip_users(
     cdr_db: Session = Depends(get_cdr_db),
 ):
 
-    instance = (
-        db.query(AsteriskInstance).filter(AsteriskInstance.id == instance_id).first()
-    )
-    if not instance:
-        raise HTTPException(status_code=400, detail="instance does not exists")
+    instance_name = _instance_name(db, instance_id)
 
     numbers = (
         cdr_db.query(PjsipEndpoint)
-        .options(joinedload(PjsipEndpoint.aors_fk), joinedload(PjsipEndpoint.auths_fk))
         .join(PjsipAor, PjsipEndpoint.aors_id == PjsipAor.pk)
-        .filter(PjsipAor.reg_server == instance.name)
+        .options(contains_eager(PjsipEndpoint.aors_fk), joinedload(PjsipEndpoint.auths_fk))
+        .filter(PjsipAor.reg_server == instance_name)
         .all()
     )
 
@@ -161,17 +168,13 @@ async def get_sip_user(
     cdr_db: Session = Depends(get_cdr_db),
 ):
 
-    instance = (
-        db.query(AsteriskInstance).filter(AsteriskInstance.id == instance_id).first()
-    )
-    if not instance:
-        raise HTTPException(status_code=400, detail="instance does not exists")
+    instance_name = _instance_name(db, instance_id)
 
     number = (
         cdr_db.query(PjsipEndpoint)
-        .options(joinedload(PjsipEndpoint.aors_fk), joinedload(PjsipEndpoint.auths_fk))
         .join(PjsipAor, PjsipEndpoint.aors_id == PjsipAor.pk)
-        .filter(PjsipAor.reg_server == instance.name)
+        .options(contains_eager(PjsipEndpoint.aors_fk), joinedload(PjsipEndpoint.auths_fk))
+        .filter(PjsipAor.reg_server == instance_name)
         .filter(PjsipEndpoint.id == endpoint_id)
         .first()
     )  # в случае чего можно заменить на PjsipAuth.id==username
@@ -187,19 +190,18 @@ async def update_sip_user_by_creds(
     cdr_db: Session = Depends(get_cdr_db),
     db: Session = Depends(get_db),
 ):
-    instance = (
-        db.query(AsteriskInstance).filter(AsteriskInstance.id == instance_id).first()
-    )
-    if not instance:
-        raise HTTPException(status_code=400, detail="instance does not exists")
+    instance_name = _instance_name(db, instance_id)
 
     # 1. Поиск по связанным таблицам
     endpoint = (
         cdr_db.query(PjsipEndpoint)
         .join(PjsipAor, PjsipEndpoint.aors_id == PjsipAor.pk)
         .join(PjsipAuth, PjsipEndpoint.auths_id == PjsipAuth.pk)
-        .options(joinedload(PjsipEndpoint.aors_fk), joinedload(PjsipEndpoint.auths_fk))
-        .filter(PjsipAor.reg_server == instance.name)
+        .options(
+            contains_eager(PjsipEndpoint.aors_fk),
+            contains_eager(PjsipEndpoint.auths_fk),
+        )
+        .filter(PjsipAor.reg_server == instance_name)
         .filter(PjsipEndpoint.id == endpoint_id)
         .first()
     )
@@ -207,7 +209,7 @@ async def update_sip_user_by_creds(
     if not endpoint:
         raise HTTPException(
             status_code=404,
-            detail=f"User with id '{endpoint_id}' on server '{instance.name}' not found",
+            detail=f"User with id '{endpoint_id}' on server '{instance_name}' not found",
         )
 
     try:
@@ -230,10 +232,11 @@ async def update_sip_user_by_creds(
             for key, value in aor_dict.items():
                 setattr(endpoint.aors_fk, key, value)
 
+        # снимок до commit вместо refresh после него
+        response = SIPUserItem.model_validate(endpoint)
         cdr_db.commit()
-        cdr_db.refresh(endpoint)
-        write_pjsip_users_conf(instance, cdr_db)
-        return endpoint
+        schedule_pjsip_users_conf_write(instance_id)
+        return response
 
     except Exception as e:
         cdr_db.rollback()
@@ -247,18 +250,14 @@ async def delete_sip_user(
     cdr_db: Session = Depends(get_cdr_db),
     db: Session = Depends(get_db),
 ):
-    instance = (
-        db.query(AsteriskInstance).filter(AsteriskInstance.id == instance_id).first()
-    )
-    if not instance:
-        raise HTTPException(status_code=400, detail="instance does not exists")
+    instance_name = _instance_name(db, instance_id)
 
     # 1. Ищем Endpoint, чтобы получить доступ к связанным ID (auth и aor)
     endpoint = (
         cdr_db.query(PjsipEndpoint)
         .join(PjsipAor, PjsipEndpoint.aors_id == PjsipAor.pk)
         .join(PjsipAuth, PjsipEndpoint.auths_id == PjsipAuth.pk)
-        .filter(PjsipAor.reg_server == instance.name)
+        .filter(PjsipAor.reg_server == instance_name)
         .filter(PjsipEndpoint.id == endpoint_id)
         .first()
     )
@@ -266,7 +265,7 @@ async def delete_sip_user(
     if not endpoint:
         raise HTTPException(
             status_code=404,
-            detail=f"User {endpoint_id} on server {instance.name} not found",
+            detail=f"User {endpoint_id} on server {instance_name} not found",
         )
 
     try:
@@ -285,7 +284,7 @@ async def delete_sip_user(
             cdr_db.delete(aor_obj)
 
         cdr_db.commit()
-        write_pjsip_users_conf(instance, cdr_db)
+        schedule_pjsip_users_conf_write(instance_id)
         return {"message": "success"}  # При 204 коде тело ответа не возвращается
 
     except Exception as e:
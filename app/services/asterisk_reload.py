@@ -1,6 +1,10 @@
+import asyncio
+import logging
 import subprocess
 from dataclasses import dataclass
 
+logger = logging.getLogger(__name__)
+
 
 @dataclass
 class ReloadResult:
@@ -20,6 +24,10 @@ def container_name_for_instance(instance_name: str) -> str:
     return f"asterisk-{instance_name}"
 
 
+def _not_running_error(container: str) -> AsteriskReloadError:
+    return AsteriskReloadError(f"Container {container} is not running")
+
+
 def _output_indicates_success(stdout: str, stderr: str) -> bool:
     combined = f"{stdout}\n{stderr}".lower()
     if not combined.strip():
@@ -34,6 +42,28 @@ def _output_indicates_success(stdout: str, stderr: str) -> bool:
     return any(marker in combined for marker in success_markers)
 
 
+def _check_result(
+    container: str,
+    command: str,
+    returncode: int,
+    stdout: str,
+    stderr: str,
+    *,
+    strict: bool,
+) -> ReloadResult:
+    reload_result = ReloadResult(stdout=stdout, stderr=stderr, returncode=returncode)
+
+    if returncode != 0:
+        if not strict or _output_indicates_success(stdout, stderr):
+            return reload_result
+        raise AsteriskReloadError(
+            f"Command '{command}' failed in {container}",
+            stderr=stderr.strip(),
+        )
+
+    return reload_result
+
+
 def run_asterisk_cli(
     instance_name: str,
     command: str,
@@ -59,51 +89,122 @@ def run_asterisk_cli(
             f"Error running '{command}' in {container}: {e}",
         ) from e
 
-    reload_result = ReloadResult(
-        stdout=result.stdout or "",
-        stderr=result.stderr or "",
-        returncode=result.returncode,
+    return _check_result(
+        container,
+        command,
+        result.returncode,
+        result.stdout or "",
+        result.stderr or "",
+        strict=strict,
     )
 
-    if result.returncode != 0:
-        if not strict or _output_indicates_success(
-            reload_result.stdout, reload_result.stderr
-        ):
-            return reload_result
-        raise AsteriskReloadError(
-            f"Command '{command}' failed in {container}",
-            stderr=reload_result.stderr.strip(),
+
+async def run_asterisk_cli_async(
+    instance_name: str,
+    command: str,
+    *,
+    timeout: int = 30,
+    strict: bool = True,
+) -> ReloadResult:
+    """То же, что run_asterisk_cli, но без блокировки event loop (для async-ручек)."""
+    container = container_name_for_instance(instance_name)
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            "docker",
+            "exec",
+            container,
+            "asterisk",
+            "-rx",
+            command,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
         )
+    except Exception as e:
+        raise AsteriskReloadError(
+            f"Error running '{command}' in {container}: {e}",
+        ) from e
+    try:
+        stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=timeout)
+    except asyncio.TimeoutError as e:
+        proc.kill()
+        await proc.wait()
+        raise AsteriskReloadError(
+            f"Timeout while running '{command}' in {container}",
+        ) from e
 
-    return reload_result
+    return _check_result(
+        container,
+        command,
+        proc.returncode,
+        stdout.decode(errors="replace"),
+        stderr.decode(errors="replace"),
+        strict=strict,
+    )
+
+
+# manager reload — AMI/manager.conf; http reload — http.conf; core reload — остальное
+_RELOAD_COMMANDS = (
+    "module reload res_config_odbc.so",
+    "manager reload",
+    "http reload",
+    "module reload res_rtp_asterisk.so",
+    "module reload res_musiconhold.so",
+    "module reload res_pjsip.so",
+    "pjsip set logger on",
+    "pjsip reload",
+    "dialplan reload",
+    "core reload",
+)
+
+
+def _skip_not_running(container: str, require_running: bool) -> list[ReloadResult]:
+    """Контейнер не запущен: reload пропускается (конфиг подхватится при старте),
+    ошибка — только если вызывающий явно требует запущенный контейнер."""
+    if require_running:
+        raise _not_running_error(container)
+    logger.info("reload skipped: container %s is not running", container)
+    return []
 
 
 def reload_asterisk_config(
     instance_name: str,
     *,
     timeout: int = 30,
+    require_running: bool = False,
 ) -> list[ReloadResult]:
-    """
-    Перезагружает конфигурацию после изменений в ast_config.
-    manager reload — AMI/manager.conf; http reload — http.conf; core reload — остальное.
-    """
-    commands = (
-        "module reload res_config_odbc.so",
-        "manager reload",
-        "http reload",
-        "module reload res_rtp_asterisk.so",
-        "module reload res_musiconhold.so",
-        "module reload res_pjsip.so",
-        "pjsip set logger on",
-        "pjsip reload",
-        "dialplan reload",
-        "core reload",
-    )
+    """Перезагружает конфигурацию после изменений в ast_config."""
+    from app.services.instance_container import container_running
+
+    container = container_name_for_instance(instance_name)
+    if not container_running(container, cached=True):
+        return _skip_not_running(container, require_running)
     results: list[ReloadResult] = []
-    for command in commands:
+    for command in _RELOAD_COMMANDS:
         results.append(
             run_asterisk_cli(
                 instance_name, command, timeout=timeout, strict=False
             )
         )
     return results
+
+
+async def reload_asterisk_config_async(
+    instance_name: str,
+    *,
+    timeout: int = 30,
+    require_running: bool = False,
+) -> list[ReloadResult]:
+    """Асинхронный reload_asterisk_config: команды по-прежнему строго по порядку."""
+    from app.services.instance_container import container_running
+
+    container = container_name_for_instance(instance_name)
+    if not await asyncio.to_thread(container_running, container, cached=True):
+        return _skip_not_running(container, require_running)
+    results: list[ReloadResult] = []
+    for command in _RELOAD_COMMANDS:
+        results.append(
+            await run_asterisk_cli_async(
+                instance_name, command, timeout=timeout, strict=False
+            )
+        )
+    return results
@@ -1,20 +1,24 @@
+import json
 import logging
 import os
 import subprocess
 
-import yaml
-
 from app.core.config import config
 from app.models.asterisk_instance import AsteriskInstance
 from app.services.asterisk_reload import container_name_for_instance
 from app.services.filebeat_config import write_filebeat_config
-from app.utils.asterisk_image import ensure_asterisk_image
+from app.services.instance_container import container_running, forget_container_state
+from app.utils.asterisk_image import ASTERISK_DOCKERFILE, ensure_asterisk_image
 from app.utils.instance_paths import docker_volume_config_dir, host_project_root
 from app.utils.instance_volumes import compose_sounds_volume, compose_voicemail_volume
 
 logger = logging.getLogger(__name__)
 
 
+COMPOSE_NETWORK = "ceph-asterisk_default"
+FILEBEAT_IMAGE = "docker.elastic.co/beats/filebeat:8.12.0"
+
+
 class InstanceComposeError(Exception):
     def __init__(self, message: str, stderr: str = ""):
         self.message = message
@@ -51,22 +55,27 @@ def compose_cli(instance_name: str, *args: str) -> list[str]:
     ]
 
 
-def filebeat_config_host_path(instance_name: str) -> str:
+def filebeat_config_host_path(
+    instance_name: str, project_root: str | None = None
+) -> str:
     return os.path.join(
-        host_project_root(),
+        project_root or host_project_root(),
         config.COMPOSE_FOLDER,
         f"filebeat-{instance_name}.yml",
     )
 
 
 def build_compose_config(instance: AsteriskInstance) -> dict:
+    # host_project_root() читает config/env — считаем один раз на сборку
+    project_root = host_project_root()
     instance_config_path = docker_volume_config_dir(instance)
-    docker_dir = os.path.join(host_project_root(), "deploy", "docker")
+    logs_path = f"{instance_config_path}/asterisk_logs"
+    docker_dir = os.path.join(project_root, "deploy", "docker")
     volumes = [
         f"{instance_config_path}:/etc/asterisk:rw",
         f"{instance_config_path}/drivers/odbc.ini:/etc/odbc.ini",
         f"{instance_config_path}/drivers/odbcinst.ini:/etc/odbcinst.ini",
-        f"{instance_config_path}/asterisk_logs:/var/log/asterisk",
+        f"{logs_path}:/var/log/asterisk",
     ]
     sounds_volume = compose_sounds_volume(instance)
     if sounds_volume:
@@ -81,7 +90,7 @@ def build_compose_config(instance: AsteriskInstance) -> dict:
                 "image": config.ASTERISK_IMAGE_TAG,
                 "build": {
                     "context": docker_dir,
-                    "dockerfile": "asterisk.Dockerfile",
+                    "dockerfile": ASTERISK_DOCKERFILE,
                 },
                 "container_name": container_name_for_instance(instance.name),
                 "ports": [
@@ -92,42 +101,32 @@ def build_compose_config(instance: AsteriskInstance) -> dict:
                     f"{instance.ami_port}:{instance.ami_port}",
                 ],
                 "volumes": volumes,
-                "networks": ["ceph-asterisk_default"],
+                "networks": [COMPOSE_NETWORK],
                 "privileged": True,
             },
             filebeat_service: {
-                "image": "docker.elastic.co/beats/filebeat:8.12.0",
+                "image": FILEBEAT_IMAGE,
                 "container_name": f"filebeat-{instance.name}",
                 "user": "root",
                 "environment": {"PBX_NAME": instance.name},
-                "networks": ["ceph-asterisk_default"],
+                "networks": [COMPOSE_NETWORK],
                 "volumes": [
-                    f"{filebeat_config_host_path(instance.name)}:/usr/share/filebeat/filebeat.yml:ro",
-                    f"{instance_config_path}/asterisk_logs:/var/log/asterisk:ro",
+                    f"{filebeat_config_host_path(instance.name, project_root)}:/usr/share/filebeat/filebeat.yml:ro",
+                    f"{logs_path}:/var/log/asterisk:ro",
                 ],
                 "depends_on": [instance.name],
             },
         },
-        "networks": {"ceph-asterisk_default": {"external": True}},
+        "networks": {COMPOSE_NETWORK: {"external": True}},
     }
 
 
-def _container_running(name: str) -> bool:
-    result = subprocess.run(
-        ["docker", "inspect", "-f", "{{.State.Running}}", name],
-        capture_output=True,
-        text=True,
-        timeout=15,
-    )
-    return result.returncode == 0 and result.stdout.strip() == "true"
-
-
 def _missing_stack_containers(instance_name: str) -> list[str]:
     expected = (
         container_name_for_instance(instance_name),
         f"filebeat-{instance_name}",
     )
-    return [name for name in expected if not _container_running(name)]
+    return [name for name in expected if not container_running(name)]
 
 
 def stop_instance_stack(instance: AsteriskInstance, *, timeout: int = 60) -> None:
@@ -137,6 +136,7 @@ def stop_instance_stack(instance: AsteriskInstance, *, timeout: int = 60) -> Non
         remove_filebeat_container,
     )
 
+    forget_container_state(instance.name)
     compose_path = compose_workdir()
     filename = compose_filename(instance.name)
     compose_file = os.path.join(compose_path, filename)
@@ -169,7 +169,8 @@ def sync_instance_compose(
     ensure_asterisk_image(force_rebuild=force_rebuild_image)
 
     with open(os.path.join(compose_path, filename), "w", encoding="utf-8") as f:
-        yaml.dump(build_compose_config(instance), f)
+        # JSON — подмножество YAML: compose читает файл как есть, эмиттер PyYAML не нужен
+        json.dump(build_compose_config(instance), f, indent=2)
 
     cmd = compose_cli(instance.name, "up", "-d", "--no-build")
     result = subprocess.run(
@@ -1,63 +1,64 @@
 """Запуск и пересоздание контейнера Asterisk с корректным volume конфигов."""
 
-import json
 import logging
 import os
-import subprocess
+import time
 
 import docker
 
 from app.core.config import config
 from app.models.asterisk_instance import AsteriskInstance
 from app.services.asterisk_reload import container_name_for_instance
+from app.utils.docker_client import get_docker_client
 from app.utils.instance_paths import docker_volume_config_dir
 
 logger = logging.getLogger(__name__)
 
+# Запомненные «контейнер запущен» (monotonic-время проверки); отрицательный
+# результат не кешируется, чтобы только что поднятый контейнер виден был сразу
+_RUNNING_TTL = 5.0
+_running_checked_at: dict[str, float] = {}
+
+
+def _get_container(container_name: str):
+    """Контейнер по имени или None (атрибуты — свежий inspect через SDK)."""
+    try:
+        return get_docker_client().containers.get(container_name)
+    except docker.errors.NotFound:
+        return None
+
 
 def get_mount_source(container_name: str, destination: str = "/etc/asterisk") -> str | None:
     try:
-        result = subprocess.run(
-            ["docker", "inspect", container_name, "--format", "{{json .Mounts}}"],
-            capture_output=True,
-            text=True,
-            timeout=15,
-        )
-        if result.returncode != 0:
+        container = _get_container(container_name)
+        if container is None:
             return None
-        mounts = json.loads(result.stdout or "[]")
-        for mount in mounts:
+        for mount in container.attrs.get("Mounts") or []:
             if mount.get("Destination") == destination:
                 return mount.get("Source")
-    except (json.JSONDecodeError, subprocess.SubprocessError, OSError) as e:
+    except docker.errors.DockerException as e:
         logger.debug("get_mount_source failed: %s", e)
     return None
 
 
 def file_exists_in_container(container_name: str, path: str) -> bool:
     try:
-        result = subprocess.run(
-            ["docker", "exec", container_name, "test", "-f", path],
-            capture_output=True,
-            timeout=15,
-        )
-        return result.returncode == 0
-    except (subprocess.SubprocessError, OSError):
+        container = _get_container(container_name)
+        if container is None:
+            return False
+        result = container.exec_run(["test", "-f", path])
+        return result.exit_code == 0
+    except docker.errors.DockerException:
         return False
 
 
 def get_container_published_ports(container_name: str) -> dict[str, str | None]:
     """Проброс портов контейнера на хост (docker inspect Ports)."""
     try:
-        result = subprocess.run(
-            ["docker", "inspect", container_name, "--format", "{{json .NetworkSettings.Ports}}"],
-            capture_output=True,
-            text=True,
-            timeout=15,
-        )
-        if result.returncode != 0:
+        container = _get_container(container_name)
+        if container is None:
             return {}
-        raw = json.loads(result.stdout or "{}")
+        raw = container.attrs.get("NetworkSettings", {}).get("Ports") or {}
         out: dict[str, str | None] = {}
         for container_port, bindings in raw.items():
             if bindings and isinstance(bindings, list):
@@ -65,11 +66,38 @@ def get_container_published_ports(container_name: str) -> dict[str, str | None]:
             else:
                 out[container_port] = None
         return out
-    except (json.JSONDecodeError, subprocess.SubprocessError, OSError) as e:
+    except docker.errors.DockerException as e:
         logger.debug("get_container_published_ports failed: %s", e)
         return {}
 
 
+def container_running(container_name: str, *, cached: bool = False) -> bool:
+    """State.Running контейнера; отсутствующий контейнер или недоступный демон — не запущен.
+
+    cached=True: «запущен», проверенный не раньше _RUNNING_TTL назад, берётся из кеша.
+    """
+    if cached:
+        checked_at = _running_checked_at.get(container_name)
+        if checked_at is not None and time.monotonic() - checked_at < _RUNNING_TTL:
+            return True
+    try:
+        container = _get_container(container_name)
+    except docker.errors.DockerException as e:
+        logger.debug("container_running failed: %s", e)
+        container = None
+    running = bool(container and container.attrs.get("State", {}).get("Running"))
+    if running:
+        _running_checked_at[container_name] = time.monotonic()
+    else:
+        _running_checked_at.pop(container_name, None)
+    return running
+
+
+def forget_container_state(instance_name: str) -> None:
+    """Сбрасывает кеш состояния после остановки/пересоздания контейнера."""
+    _running_checked_at.pop(container_name_for_instance(instance_name), None)
+
+
 def verify_instance_network(instance: AsteriskInstance) -> dict:
     """Проверка, что SIP-порт опубликован на хост (иначе REGISTER не дойдёт)."""
     container = container_name_for_instance(instance.name)
@@ -129,10 +157,10 @@ def verify_instance_config_mount(instance: AsteriskInstance) -> dict:
 
 
 def remove_asterisk_container(instance_name: str) -> None:
-    client = docker.from_env()
+    forget_container_state(instance_name)
     name = container_name_for_instance(instance_name)
     try:
-        container = client.containers.get(name)
+        container = get_docker_client().containers.get(name)
         container.stop(timeout=15)
         container.remove()
     except docker.errors.NotFound:
@@ -140,10 +168,9 @@ def remove_asterisk_container(instance_name: str) -> None:
 
 
 def remove_filebeat_container(instance_name: str) -> None:
-    client = docker.from_env()
     name = f"filebeat-{instance_name}"
     try:
-        container = client.containers.get(name)
+        container = get_docker_client().containers.get(name)
         container.stop(timeout=15)
         container.remove()
     except docker.errors.NotFound:
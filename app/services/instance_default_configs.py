@@ -66,9 +66,7 @@ exten => 8097,n,Hangup()
 """
 
 
-def _get_empty_extensions_conf() -> str:
-    """Возвращает пустой extensions.conf без тестовых диалпланов."""
-    return """[from-internal]
+_EMPTY_EXTENSIONS_CONF = """[from-internal]
 
 [from-external]
 """
@@ -89,9 +87,7 @@ member => PJSIP/102
 """
 
 
-def _get_empty_queues_conf() -> str:
-    """Возвращает пустой queues.conf без тестовых очередей."""
-    return """[general]
+_EMPTY_QUEUES_CONF = """[general]
 persistentmembers = yes
 """
 
@@ -127,15 +123,7 @@ def seed_test_dialplan(
     return row_counts
 
 
-def get_db_config_templates(
-    instance: AsteriskInstanceCreate,
-    transport_type: str,
-) -> dict[str, str]:
-    """Конфиги, которые сидируются в ast_config."""
-
-    return {
-        "extensions.conf": _get_empty_extensions_conf(),
-        "voicemail.conf": """[general]
+_VOICEMAIL_CONF = """[general]
 format = wav49|gsm|wav
 serveremail = asterisk
 attach = yes
@@ -147,12 +135,13 @@ sendvoicemail = yes
 review = yes
 
 [default]
-""",
-        "queues.conf": _get_empty_queues_conf(),
-        "stasis.conf": """[general]
+"""
+
+_STASIS_CONF = """[general]
 enabled=no
-""",
-        "cdr.conf": """[general]
+"""
+
+_CDR_CONF = """[general]
 enable=yes
 unanswered=yes
 
@@ -160,56 +149,51 @@ unanswered=yes
 usegmtime=yes
 loguniqueid=yes
 loguserfield=yes
-""",
-        "cdr_adaptive_odbc.conf": f"""[mysql]
-connection={config.ASTERISK_ODBC_ID}
-table={config.MYSQL_CDR_TABLE}
-""",
-        "manager.conf": f"""[general]
+"""
+
+_CDR_ADAPTIVE_ODBC_CONF = """[mysql]
+connection={odbc_id}
+table={cdr_table}
+"""
+
+_MANAGER_CONF = """[general]
 enabled = yes
-port = {instance.ami_port}
+port = {ami_port}
 bindaddr = 0.0.0.0
 
-[{config.MYSQL_ASTERISK_USER}]
-secret = {config.MYSQL_ASTERISK_USER_PASSWORD}
+[{ami_user}]
+secret = {ami_secret}
 read = system,call,config
 write = system,call,config,command
-""",
-        "rtp.conf": f"""[general]
-rtpstart={instance.rtp_port_start}
-rtpend={instance.rtp_port_end}
+"""
+
+_RTP_CONF = """[general]
+rtpstart={rtp_port_start}
+rtpend={rtp_port_end}
 strictrtp=no
 icesupport=no
-""",
-        "http.conf": f"""[general]
+"""
+
+_HTTP_CONF = """[general]
 enabled=yes
 bindaddr=0.0.0.0
-bindport={instance.http_port}
-""",
-    }
-
-
-def get_disk_config_templates(
-    instance: AsteriskInstanceCreate,
-    transport_type: str,
-) -> dict[str, str]:
-    """Конфиги, которые остаются на диске (bootstrap / ODBC / sorcery)."""
-    async_tcp = "async_operations=1" if transport_type == "tcp" else ""
+bindport={http_port}
+"""
 
-    return {
-        "pjsip.conf": f"""[global]
+_PJSIP_CONF = """[global]
 endpoint_identifier_order=username,ip,anonymous
 
 [transport-{transport_type}]
 type=transport
 protocol={transport_type}
-bind=0.0.0.0:{instance.sip_port}
+bind=0.0.0.0:{sip_port}
 {async_tcp}
 local_net=172.18.0.0/16
-external_media_address={config.PJSIP_EXTERNAL_ADDRESS}
-external_signaling_address={config.PJSIP_EXTERNAL_ADDRESS}
-""",
-        "asterisk.conf": f"""[directories]
+external_media_address={external_address}
+external_signaling_address={external_address}
+"""
+
+_ASTERISK_CONF = """[directories]
 astetcdir => /etc/asterisk
 astmoddir => /usr/lib/asterisk/modules
 astvarlibdir => /var/lib/asterisk
@@ -226,9 +210,10 @@ astlogdir => /var/log/asterisk
 verbose = 3
 debug = 0
 maxfiles = 100000
-systemname = {instance.name}
-""",
-        "modules.conf": """[modules]
+systemname = {name}
+"""
+
+_MODULES_CONF = """[modules]
 autoload = yes
 preload => res_sorcery.so
 preload => res_sorcery_config.so
@@ -254,21 +239,25 @@ load => format_wav.so
 load => format_gsm.so
 load => format_pcm.so
 load => cdr_adaptive_odbc.so
-""",
-        "musiconhold.conf": """[general]
+"""
+
+_MUSICONHOLD_CONF = """[general]
 [default]
 mode=files
 directory=/var/lib/asterisk/moh
 random=yes
-""",
-        "logger.conf": """[general]
+"""
+
+_LOGGER_CONF = """[general]
 dateformat=%F %T
 [logfiles]
 console => debug,verbose,notice,warning,error
 messages => debug,verbose,notice,warning,error
-""",
-        "pjsip_users.conf": "; PJSIP users: генерируется из БД (services/pjsip_disk_sync.py)\n",
-        "sorcery.conf": """[res_pjsip]
+"""
+
+_PJSIP_USERS_CONF = "; PJSIP users: генерируется из БД (services/pjsip_disk_sync.py)\n"
+
+_SORCERY_CONF = """[res_pjsip]
 transport=config,pjsip.conf,criteria=type=transport
 global=config,pjsip.conf,criteria=type=global
 endpoint=realtime,ps_endpoints
@@ -281,26 +270,110 @@ identify=realtime,ps_endpoint_id_ips
 
 [res_pjsip_endpoint_identifier_user]
 endpoint=realtime,ps_endpoints
-""",
-        "res_odbc.conf": f"""[{config.ASTERISK_ODBC_ID}]
+"""
+
+_RES_ODBC_CONF = """[{odbc_id}]
 enabled => yes
-dsn => {config.DSN}
-username => {config.MYSQL_ASTERISK_USER}
-password => {config.MYSQL_ASTERISK_USER_PASSWORD}
+dsn => {dsn}
+username => {db_user}
+password => {db_password}
 pre-connect => yes
-""",
-        "drivers/odbc.ini": f"""[{config.DSN}]
+"""
+
+_ODBC_INI = """[{dsn}]
 Description = MySQL connection to Asterisk
 Driver      = MySQL
-Database    = {config.MYSQL_DATABASE_CDR}
-Server      = {config.MYSQL_CONTAINER_NAME}
-User        = {config.MYSQL_ASTERISK_USER}
-Password    = {config.MYSQL_ASTERISK_USER_PASSWORD}
-Port        = {config.MYSQL_PORT}
-""",
-        "drivers/odbcinst.ini": """[MySQL]
+Database    = {db_name}
+Server      = {db_host}
+User        = {db_user}
+Password    = {db_password}
+Port        = {db_port}
+"""
+
+_ODBCINST_INI = """[MySQL]
 Description = ODBC for MySQL
 Driver      = /usr/lib/x86_64-linux-gnu/odbc/libmaodbc.so
 FileUsage   = 1
-""",
+"""
+
+
+# Шаблоны, зависящие только от config, рендерятся один раз при импорте
+_CDR_ADAPTIVE_ODBC_RENDERED = _CDR_ADAPTIVE_ODBC_CONF.format(
+    odbc_id=config.ASTERISK_ODBC_ID,
+    cdr_table=config.MYSQL_CDR_TABLE,
+)
+_RES_ODBC_RENDERED = _RES_ODBC_CONF.format(
+    odbc_id=config.ASTERISK_ODBC_ID,
+    dsn=config.DSN,
+    db_user=config.MYSQL_ASTERISK_USER,
+    db_password=config.MYSQL_ASTERISK_USER_PASSWORD,
+)
+_ODBC_INI_RENDERED = _ODBC_INI.format(
+    dsn=config.DSN,
+    db_name=config.MYSQL_DATABASE_CDR,
+    db_host=config.MYSQL_CONTAINER_NAME,
+    db_user=config.MYSQL_ASTERISK_USER,
+    db_password=config.MYSQL_ASTERISK_USER_PASSWORD,
+    db_port=config.MYSQL_PORT,
+)
+
+
+def _template_context(
+    instance: AsteriskInstanceCreate,
+    transport_type: str,
+) -> dict[str, object]:
+    """Значения для подстановки в шаблоны конфигов (str.format_map)."""
+    return {
+        "name": instance.name,
+        "sip_port": instance.sip_port,
+        "http_port": instance.http_port,
+        "ami_port": instance.ami_port,
+        "rtp_port_start": instance.rtp_port_start,
+        "rtp_port_end": instance.rtp_port_end,
+        "transport_type": transport_type,
+        "async_tcp": "async_operations=1" if transport_type == "tcp" else "",
+        "external_address": config.PJSIP_EXTERNAL_ADDRESS,
+        "ami_user": config.MYSQL_ASTERISK_USER,
+        "ami_secret": config.MYSQL_ASTERISK_USER_PASSWORD,
+    }
+
+
+def get_db_config_templates(
+    instance: AsteriskInstanceCreate,
+    transport_type: str,
+) -> dict[str, str]:
+    """Конфиги, которые сидируются в ast_config."""
+    ctx = _template_context(instance, transport_type)
+
+    return {
+        "extensions.conf": _EMPTY_EXTENSIONS_CONF,
+        "voicemail.conf": _VOICEMAIL_CONF,
+        "queues.conf": _EMPTY_QUEUES_CONF,
+        "stasis.conf": _STASIS_CONF,
+        "cdr.conf": _CDR_CONF,
+        "cdr_adaptive_odbc.conf": _CDR_ADAPTIVE_ODBC_RENDERED,
+        "manager.conf": _MANAGER_CONF.format_map(ctx),
+        "rtp.conf": _RTP_CONF.format_map(ctx),
+        "http.conf": _HTTP_CONF.format_map(ctx),
+    }
+
+
+def get_disk_config_templates(
+    instance: AsteriskInstanceCreate,
+    transport_type: str,
+) -> dict[str, str]:
+    """Конфиги, которые остаются на диске (bootstrap / ODBC / sorcery)."""
+    ctx = _template_context(instance, transport_type)
+
+    return {
+        "pjsip.conf": _PJSIP_CONF.format_map(ctx),
+        "asterisk.conf": _ASTERISK_CONF.format_map(ctx),
+        "modules.conf": _MODULES_CONF,
+        "musiconhold.conf": _MUSICONHOLD_CONF,
+        "logger.conf": _LOGGER_CONF,
+        "pjsip_users.conf": _PJSIP_USERS_CONF,
+        "sorcery.conf": _SORCERY_CONF,
+        "res_odbc.conf": _RES_ODBC_RENDERED,
+        "drivers/odbc.ini": _ODBC_INI_RENDERED,
+        "drivers/odbcinst.ini": _ODBCINST_INI,
     }
@@ -1,5 +1,6 @@
 """Создание PJSIP-пользователей при создании АТС."""
 
+from sqlalchemy import insert, select
 from sqlalchemy.orm import Session
 
 from app.models.sip_user import PjsipAor, PjsipAuth, PjsipEndpoint
@@ -38,24 +39,30 @@ def seed_default_pjsip_users(
         transport_type: Тип транспорта
         test_users: Кортеж с данными пользователей. По умолчанию None (пустой список)
     """
-    created: list[str] = []
     transport = f"transport-{transport_type}"
 
     # Если тестовые данные не переданы, используем пустой список
     users_to_create = test_users if test_users is not None else ()
+    usernames = [str(user["username"]) for user in users_to_create]
+    if not usernames:
+        return []
 
-    for user in users_to_create:
-        username = str(user["username"])
-        existing = (
-            cdr_db.query(PjsipEndpoint)
+    # существующие номера инстанса — одним запросом на весь набор
+    existing = set(
+        cdr_db.scalars(
+            select(PjsipEndpoint.id)
             .join(PjsipAor, PjsipEndpoint.aors_id == PjsipAor.pk)
-            .filter(PjsipAor.reg_server == instance_name)
-            .filter(PjsipEndpoint.id == username)
-            .first()
+            .where(PjsipAor.reg_server == instance_name)
+            .where(PjsipEndpoint.id.in_(usernames))
         )
-        if existing:
-            continue
+    )
 
+    pending: list[tuple[dict[str, str | int], PjsipAor, PjsipAuth]] = []
+    for user in users_to_create:
+        username = str(user["username"])
+        if username in existing:
+            continue
+        existing.add(username)
         new_aor = PjsipAor(
             id=username,
             max_contacts=1,
@@ -66,25 +73,32 @@ def seed_default_pjsip_users(
             username=username,
             password=str(user["password"]),
         )
-        cdr_db.add(new_aor)
-        cdr_db.add(new_auth)
-        cdr_db.flush()
+        pending.append((user, new_aor, new_auth))
 
-        cdr_db.add(
-            PjsipEndpoint(
-                id=username,
-                aors=username,
-                auth=f"{username}-auth",
-                auths_id=new_auth.pk,
-                aors_id=new_aor.pk,
-                context=str(user["context"]),
-                transport=transport,
-                callerid=_format_callerid(str(user["callerid"]), username),
-                mailboxes=f"{username}@default",
-            )
-        )
-        created.append(username)
+    if not pending:
+        return []
 
-    if created:
-        cdr_db.commit()
-    return created
+    # pk AOR/Auth нужны endpoint'ам: один flush на все строки
+    cdr_db.add_all([obj for _, aor, auth in pending for obj in (aor, auth)])
+    cdr_db.flush()
+
+    # endpoint'ы — одним многострочным INSERT
+    cdr_db.execute(
+        insert(PjsipEndpoint),
+        [
+            {
+                "id": aor.id,
+                "aors": aor.id,
+                "auth": auth.id,
+                "auths_id": auth.pk,
+                "aors_id": aor.pk,
+                "context": str(user["context"]),
+                "transport": transport,
+                "callerid": _format_callerid(str(user["callerid"]), aor.id),
+                "mailboxes": f"{aor.id}@default",
+            }
+            for user, aor, auth in pending
+        ],
+    )
+    cdr_db.commit()
+    return [aor.id for _, aor, _ in pending]
@@ -10,40 +10,35 @@ logger = logging.getLogger(__name__)
 
 def apply_instance_ports_runtime(instance_id: int) -> None:
     """Compose + reload после смены AMI, HTTP или RTP (фоновая задача)."""
-    db = SessionLocal()
+    with SessionLocal() as db:
+        instance = db.get(AsteriskInstance, instance_id)
+    # сессия закрыта до compose/reload: соединение не держится минутами,
+    # загруженные атрибуты detached-объекта остаются доступны
+    if instance is None:
+        logger.error(
+            "apply_instance_ports_runtime: instance %s not found", instance_id
+        )
+        return
+
+    try:
+        sync_instance_compose(instance)
+    except InstanceComposeError as e:
+        logger.warning(
+            "compose sync after port change (instance=%s): %s %s",
+            instance_id,
+            e.message,
+            e.stderr,
+        )
+
     try:
-        instance = (
-            db.query(AsteriskInstance)
-            .filter(AsteriskInstance.id == instance_id)
-            .first()
+        reload_asterisk_config(instance.name)
+    except AsteriskReloadError as e:
+        logger.warning(
+            "asterisk reload after port change (instance=%s): %s %s",
+            instance_id,
+            e.message,
+            e.stderr,
         )
-        if instance is None:
-            logger.error(
-                "apply_instance_ports_runtime: instance %s not found", instance_id
-            )
-            return
-
-        try:
-            sync_instance_compose(instance)
-        except InstanceComposeError as e:
-            logger.warning(
-                "compose sync after port change (instance=%s): %s %s",
-                instance_id,
-                e.message,
-                e.stderr,
-            )
-
-        try:
-            reload_asterisk_config(instance.name)
-        except AsteriskReloadError as e:
-            logger.warning(
-                "asterisk reload after port change (instance=%s): %s %s",
-                instance_id,
-                e.message,
-                e.stderr,
-            )
-    finally:
-        db.close()
 
 
 # обратная совместимость
@@ -1,15 +1,20 @@
 """Генерация pjsip_users.conf из БД (источник истины — ps_*)."""
 
+import logging
 import os
+import threading
 from enum import Enum
 
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session, contains_eager, joinedload
 
 from app.core.config import config
+from app.core.database import SessionCDR, SessionLocal
 from app.models.asterisk_instance import AsteriskInstance
 from app.utils.instance_paths import writable_config_dir
 from app.models.sip_user import PjsipEndpoint, PjsipAor
 
+logger = logging.getLogger(__name__)
+
 PJSIP_USERS_FILENAME = "pjsip_users.conf"
 
 SORCERY_CONF_CONTENT = """[res_pjsip]
@@ -74,11 +79,12 @@ def render_pjsip_users_conf(cdr_db: Session, reg_server: str) -> str:
     """Собирает pjsip_users.conf для одного инстанса из ps_*."""
     endpoints = (
         cdr_db.query(PjsipEndpoint)
+        .join(PjsipAor, PjsipEndpoint.aors_id == PjsipAor.pk)
         .options(
-            joinedload(PjsipEndpoint.aors_fk),
+            # ps_aors уже в JOIN для фильтра — грузим AOR из него, без второго JOIN
+            contains_eager(PjsipEndpoint.aors_fk),
             joinedload(PjsipEndpoint.auths_fk),
         )
-        .join(PjsipAor, PjsipEndpoint.aors_id == PjsipAor.pk)
         .filter(PjsipAor.reg_server == reg_server)
         .all()
     )
@@ -211,3 +217,47 @@ def write_pjsip_users_conf(instance: AsteriskInstance, cdr_db: Session) -> str:
     except OSError:
         pass
     return filepath
+
+
+# Окно склейки: серия правок абонентов одного инстанса даёт одну перезапись файла.
+# Таймер свой, а не BackgroundTasks: Starlette пропускает фоновые задачи, если
+# отправка ответа сорвалась, и отметка "запись запланирована" осталась бы навсегда
+PJSIP_USERS_WRITE_DELAY = 1.0
+_pending_timers: dict[int, threading.Timer] = {}
+_pending_lock = threading.Lock()
+
+
+def _write_pjsip_users_conf_for(instance_id: int) -> None:
+    with SessionLocal() as db:
+        instance = db.get(AsteriskInstance, instance_id)
+    if instance is None:
+        return
+    with SessionCDR() as cdr_db:
+        write_pjsip_users_conf(instance, cdr_db)
+
+
+def _flush_pjsip_users_conf(instance_id: int) -> None:
+    try:
+        # снимаем отметку до чтения БД: правки после этой точки запланируют новую запись
+        with _pending_lock:
+            _pending_timers.pop(instance_id, None)
+        _write_pjsip_users_conf_for(instance_id)
+    except Exception:
+        logger.exception("pjsip_users.conf write failed (instance=%s)", instance_id)
+
+
+def schedule_pjsip_users_conf_write(instance_id: int) -> None:
+    """Откладывает запись pjsip_users.conf на окно склейки; повторы в окне склеиваются."""
+    with _pending_lock:
+        if instance_id in _pending_timers:
+            return
+        timer = threading.Timer(
+            PJSIP_USERS_WRITE_DELAY, _flush_pjsip_users_conf, args=(instance_id,)
+        )
+        timer.daemon = True
+        _pending_timers[instance_id] = timer
+        try:
+            timer.start()
+        except BaseException:
+            del _pending_timers[instance_id]
+            raise
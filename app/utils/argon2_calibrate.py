@@ -0,0 +1,69 @@
+"""Подбор memory_cost Argon2id под целевое время хеширования (запускается вручную).
+
+    python -m app.utils.argon2_calibrate [target_ms] [max_memory_mib]
+
+Запускать на целевом хосте без нагрузки; результат прописать в .env.fastapi
+(ARGON2_MEMORY_KIB). Сервис параметры не подбирает: иначе у каждого воркера и
+после каждого рестарта они разные, а старт медленнее на пару секунд.
+"""
+
+import sys
+import time
+
+from argon2 import PasswordHasher, Type
+
+# нижняя граница OWASP для Argon2id: m=46 MiB, t=1, p=1
+MIN_MEMORY_KIB = 46 * 1024
+TIME_COST = 1
+PARALLELISM = 1
+
+
+def _hash_seconds(memory_cost: int) -> float:
+    hasher = PasswordHasher(
+        time_cost=TIME_COST,
+        memory_cost=memory_cost,
+        parallelism=PARALLELISM,
+        type=Type.ID,
+    )
+    start = time.perf_counter()
+    hasher.hash("calibration")
+    return time.perf_counter() - start
+
+
+def calibrate_memory_cost(target_ms: int, max_memory_mib: int) -> int:
+    """memory_cost (KiB), при котором хеш занимает ~target_ms на этом хосте (±10%)."""
+    low = MIN_MEMORY_KIB
+    ceiling = max(low, max_memory_mib * 1024)
+    target = target_ms / 1000
+    if target <= 0 or _hash_seconds(low) >= target * 0.9:
+        return low
+
+    # удваиваем, пока не перелетим цель, затем делим отрезок пополам
+    high = low
+    while True:
+        if high >= ceiling:
+            return ceiling
+        high = min(high * 2, ceiling)
+        if _hash_seconds(high) >= target:
+            break
+        low = high
+
+    for _ in range(6):
+        mid = (low + high) // 2
+        elapsed = _hash_seconds(mid)
+        if abs(elapsed - target) <= target * 0.1:
+            return mid
+        if elapsed < target:
+            low = mid
+        else:
+            high = mid
+    return low
+
+
+if __name__ == "__main__":
+    target_ms = int(sys.argv[1]) if len(sys.argv) > 1 else 250
+    max_memory_mib = int(sys.argv[2]) if len(sys.argv) > 2 else 256
+    memory_kib = calibrate_memory_cost(target_ms, max_memory_mib)
+    print(f"ARGON2_MEMORY_KIB={memory_kib}")
+    print(f"ARGON2_TIME_COST={TIME_COST}")
+    print(f"ARGON2_PARALLELISM={PARALLELISM}")
@@ -1,13 +1,18 @@
 """Сборка образа Asterisk (deploy/docker/asterisk.Dockerfile)."""
 
+import fcntl
 import logging
 import os
 import subprocess
+import tempfile
+import threading
+from contextlib import contextmanager
 
 import docker
 from docker.errors import ImageNotFound
 
 from app.core.config import config
+from app.utils.docker_client import get_docker_client
 from app.utils.instance_paths import host_project_root
 
 logger = logging.getLogger(__name__)
@@ -15,6 +20,12 @@ logger = logging.getLogger(__name__)
 ASTERISK_DOCKER_DIR = "deploy/docker"
 ASTERISK_DOCKERFILE = "asterisk.Dockerfile"
 
+# id образов, в которых промпты vm-* уже найдены (id меняется при пересборке)
+_verified_image_ids: set[str] = set()
+# threading.Lock — между потоками воркера, flock на файле — между воркерами uvicorn
+_image_lock = threading.Lock()
+_IMAGE_LOCK_PATH = os.path.join(tempfile.gettempdir(), "asterisk-image.lock")
+
 # Промпты в /opt — не перекрываются VOLUME базового образа на /var/lib/asterisk/sounds
 _VM_SOUNDS_CHECK = (
     "ls -la /opt/asterisk-core-sounds/en/vm-intro.ulaw "
@@ -69,13 +80,8 @@ def image_has_voicemail_sounds(tag: str | None = None) -> bool:
     """Проверяет vm-intro и vm-password в образе (путь /opt/...)."""
     tag = tag or config.ASTERISK_IMAGE_TAG
     try:
-        subprocess.run(
-            ["docker", "image", "inspect", tag],
-            capture_output=True,
-            check=True,
-            timeout=15,
-        )
-    except (subprocess.CalledProcessError, subprocess.TimeoutExpired, OSError):
+        get_docker_client().images.get(tag)
+    except docker.errors.DockerException:
         return False
 
     result = subprocess.run(
@@ -102,13 +108,45 @@ def ensure_asterisk_image(client=None, *, force_rebuild: bool = False):
     Возвращает образ Asterisk с промптами voicemail.
     Пересобирает, если образа нет, force_rebuild или не хватает vm-*.
     """
-    client = client or docker.from_env()
+    # прогрев при старте и create могут прийти одновременно — одна сборка за раз
+    with _image_build_lock(blocking=True):
+        return _ensure_asterisk_image(client, force_rebuild=force_rebuild)
+
+
+@contextmanager
+def _image_build_lock(*, blocking: bool):
+    """Отдаёт True, если блокировка взята; при blocking=False — False, если занята."""
+    if not _image_lock.acquire(blocking=blocking):
+        yield False
+        return
+    try:
+        with open(_IMAGE_LOCK_PATH, "a") as lock_file:
+            flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+            try:
+                fcntl.flock(lock_file, flags)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+    finally:
+        _image_lock.release()
+
+
+def _ensure_asterisk_image(client, *, force_rebuild: bool):
+    client = client or get_docker_client()
     tag = config.ASTERISK_IMAGE_TAG
 
     if not force_rebuild:
         try:
             image = client.images.get(tag)
+            # проверка промптов — `docker run` на секунды; образ с тем же id уже проверен
+            if image.id in _verified_image_ids:
+                return image
             if image_has_voicemail_sounds(tag):
+                _verified_image_ids.add(image.id)
                 return image
             logger.warning(
                 "Image %s exists but required vm-* prompts missing; rebuilding", tag
@@ -119,10 +157,27 @@ def ensure_asterisk_image(client=None, *, force_rebuild: bool = False):
     image, _build_logs = build_asterisk_image(
         client, tag=tag, nocache=force_rebuild
     )
-    if not image_has_voicemail_sounds(tag):
+    if image_has_voicemail_sounds(tag):
+        _verified_image_ids.add(image.id)
+    else:
         logger.warning(
             "Image %s: required vm-* prompts not found in docker run check; "
             "ensure astsoundsdir => /opt/asterisk-core-sounds in asterisk.conf",
             tag,
         )
     return image
+
+
+def warm_asterisk_image() -> None:
+    """Готовит образ при старте API, чтобы первый create не ждал сборку и проверку.
+
+    Если образ уже собирает другой воркер (или create в этом), прогрев пропускается.
+    """
+    try:
+        with _image_build_lock(blocking=False) as acquired:
+            if not acquired:
+                logger.info("Asterisk image is being prepared elsewhere; skipping warm-up")
+                return
+            _ensure_asterisk_image(None, force_rebuild=False)
+    except Exception as e:
+        logger.warning("Asterisk image warm-up failed: %s", e)
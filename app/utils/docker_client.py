@@ -0,0 +1,11 @@
+"""Общий клиент Docker SDK на процесс (одно соединение с демоном вместо fork docker CLI)."""
+
+from functools import lru_cache
+
+import docker
+
+
+@lru_cache(maxsize=1)
+def get_docker_client() -> docker.DockerClient:
+    """Клиент создаётся при первом обращении и переиспользуется всеми вызовами."""
+    return docker.from_env()
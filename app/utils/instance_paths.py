@@ -33,8 +33,8 @@ def docker_volume_config_dir(instance: AsteriskInstance) -> str:
     )
 
 
-def writable_config_dir_for_name(name: str) -> str:
-    """Каталог конфигов по имени АТС (до создания записи в БД)."""
+def config_dir_for_name(name: str) -> str:
+    """Каталог конфигов по имени АТС без создания на диске."""
     candidates = [
         os.path.join("/app", config.CONFIG_FOLDER, name),
         os.path.join(host_project_root(), config.CONFIG_FOLDER, name),
@@ -43,9 +43,7 @@ def writable_config_dir_for_name(name: str) -> str:
     for path in candidates:
         if os.path.isdir(path):
             return os.path.normpath(path)
-    default = candidates[0] if os.path.isdir("/app") else candidates[1]
-    os.makedirs(default, exist_ok=True)
-    return default
+    return candidates[0] if os.path.isdir("/app") else candidates[1]
 
 
 def writable_config_dir(instance: AsteriskInstance) -> str:
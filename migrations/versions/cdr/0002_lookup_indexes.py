@@ -0,0 +1,42 @@
+"""lookup indexes for pjsip users and ast_config
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-15
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0002_cdr"
+down_revision: Union[str, Sequence[str], None] = "0001_cdr"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # users CRUD и pjsip_users.conf: WHERE reg_server = :name [AND id = :ext]
+    op.create_index(
+        "ix_ps_aors_reg_server_id",
+        "ps_aors",
+        ["reg_server", "id"],
+        unique=False,
+    )
+    op.create_index(
+        op.f("ix_ps_endpoints_id"), "ps_endpoints", ["id"], unique=False
+    )
+    # static realtime: выборка файла конкретного инстанса
+    op.create_index(
+        "ix_ast_config_instance_id_filename",
+        "ast_config",
+        ["instance_id", "filename"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_ast_config_instance_id_filename", table_name="ast_config")
+    op.drop_index(op.f("ix_ps_endpoints_id"), table_name="ps_endpoints")
+    op.drop_index("ix_ps_aors_reg_server_id", table_name="ps_aors")
@@ -0,0 +1,61 @@
+"""unique pjsip aor per instance
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-15
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0003_cdr"
+down_revision: Union[str, Sequence[str], None] = "0002_cdr"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _abort_on_duplicate_aors() -> None:
+    """Дубли (reg_server, id) не удаляем сами: на AOR ссылаются endpoint'ы
+    (ON DELETE CASCADE). Останавливаемся со списком, что нужно разобрать вручную."""
+    rows = op.get_bind().execute(
+        sa.text(
+            "SELECT reg_server, id, GROUP_CONCAT(pk ORDER BY pk) AS pks "
+            "FROM ps_aors GROUP BY reg_server, id HAVING COUNT(*) > 1"
+        )
+    ).all()
+    if not rows:
+        return
+    duplicates = "; ".join(
+        f"reg_server={reg_server!r} id={aor_id!r} pk=[{pks}]"
+        for reg_server, aor_id, pks in rows
+    )
+    raise RuntimeError(
+        "ps_aors содержит дубли (reg_server, id), уникальный индекс не создать. "
+        "Удалите лишние строки (и их ps_endpoints/ps_auths) и повторите миграцию: "
+        + duplicates
+    )
+
+
+def upgrade() -> None:
+    # номер (AOR id) уникален в пределах инстанса: дубль ловится INSERT'ом, без pre-check
+    _abort_on_duplicate_aors()
+    op.drop_index("ix_ps_aors_reg_server_id", table_name="ps_aors")
+    op.create_index(
+        "uq_ps_aors_reg_server_id",
+        "ps_aors",
+        ["reg_server", "id"],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("uq_ps_aors_reg_server_id", table_name="ps_aors")
+    op.create_index(
+        "ix_ps_aors_reg_server_id",
+        "ps_aors",
+        ["reg_server", "id"],
+        unique=False,
+    )
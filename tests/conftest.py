@@ -0,0 +1,45 @@
+"""Минимальное окружение для импорта app.core.config без .env-файлов."""
+
+import os
+
+_TEST_ENV = {
+    "DEV_MODE": "true",
+    "HOSTNAME": "localhost",
+    "DB_HOSTNAME": "localhost",
+    "MYSQL_DATABASE": "asterisk",
+    "MYSQL_DATABASE_CDR": "asterisk_cdr",
+    "MYSQL_USER": "user",
+    "MYSQL_PASSWORD": "password",
+    "MYSQL_ASTERISK_USER": "asterisk_user",
+    "MYSQL_ASTERISK_USER_PASSWORD": "user_password",
+    "MYSQL_PORT": "3306",
+    "MYSQL_CONTAINER_NAME": "mysql",
+    "MYSQL_CDR_TABLE": "asterisk_cdr",
+    "ASTERISK_IMAGE_TAG": "asterisk:test",
+    "ASTERISK_IMAGE_PATH": "deploy/docker",
+    "PROJECT_PATH": "/tmp",
+    "CONFIG_FOLDER": "asterisk_configs",
+    "COMPOSE_FOLDER": "docker-compose",
+    "ASTERISK_ODBC_ID": "asterisk_cdr",
+    "DSN": "asterisk-connector",
+    "PJSIP_EXTERNAL_ADDRESS": "127.0.0.1",
+    "ASTERISK_UID": "1000",
+    "ASTERISK_GID": "1000",
+    "ALGORITHM": "HS256",
+    "SECRET_KEY": "test-access-secret-key-0123456789abcdef",
+    "REFRESH_SECRET_KEY": "test-refresh-secret-key-0123456789abcdef",
+    "ARGON2_MEMORY_KIB": "8192",
+    "LDAP_ENABLED": "false",
+    "LDAP_SERVER": "localhost",
+    "LDAP_PORT": "389",
+    "LDAP_USE_SSL": "false",
+    "LDAP_BASE_DN": "dc=example,dc=org",
+    "LDAP_USER_DN_TEMPLATE": "uid={username},dc=example,dc=org",
+    "LDAP_ADMIN_DN": "cn=admin,dc=example,dc=org",
+    "LDAP_ADMIN_PASSWORD": "admin",
+    "LDAP_SEARCH_BASE": "dc=example,dc=org",
+    "LDAP_SEARCH_FILTER": "(uid={username})",
+}
+
+for _key, _value in _TEST_ENV.items():
+    os.environ.setdefault(_key, _value)
@@ -0,0 +1,196 @@
+"""Быстрая проверка HS256 (_decode_hs256) против эталона PyJWT."""
+
+import base64
+import threading
+import time
+
+import jwt
+import pytest
+
+from app.core import security
+from app.core.config import config
+
+ACCESS_KEY = config.SECRET_KEY
+
+
+def _pyjwt_token(payload: dict, headers: dict | None = None) -> str:
+    return jwt.encode(payload, ACCESS_KEY, algorithm="HS256", headers=headers)
+
+
+def _pyjwt_decode(token: str) -> dict:
+    return jwt.decode(token, ACCESS_KEY, algorithms=["HS256"])
+
+
+def _payload(**claims) -> dict:
+    return {
+        "user_id": 1,
+        "login": "alice",
+        "exp": int(time.time()) + 60,
+        "type": "access",
+        **claims,
+    }
+
+
+@pytest.fixture
+def pyjwt_calls(monkeypatch):
+    """Считает, сколько раз verify_token ушёл в PyJWT (fallback)."""
+    calls = []
+    original = security._JWT.decode
+
+    def spy(*args, **kwargs):
+        calls.append(args[0])
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(security._JWT, "decode", spy)
+    return calls
+
+
+def test_own_token_matches_pyjwt(pyjwt_calls):
+    token = security.create_access_token({"user_id": 1, "login": "alice"})
+
+    assert security.verify_token(token) == _pyjwt_decode(token)
+    assert pyjwt_calls == []
+
+
+def test_tampered_signature_rejected():
+    token = security.create_access_token({"user_id": 2, "login": "bob"})
+    head, body, signature = token.split(".")
+    raw = bytearray(base64.urlsafe_b64decode(signature + "="))
+    raw[0] ^= 0xFF
+    forged = f"{head}.{body}.{base64.urlsafe_b64encode(raw).rstrip(b'=').decode()}"
+
+    with pytest.raises(jwt.InvalidSignatureError):
+        _pyjwt_decode(forged)
+    assert security.verify_token(forged) is None
+
+
+def test_truncated_signature_rejected():
+    token = security.create_access_token({"user_id": 3, "login": "carol"})
+    forged = token[: -len(token.rsplit(".", 1)[1]) // 2]
+
+    with pytest.raises(jwt.PyJWTError):
+        _pyjwt_decode(forged)
+    assert security.verify_token(forged) is None
+
+
+def test_changed_header_without_resign_rejected():
+    token = security.create_access_token({"user_id": 4, "login": "dave"})
+    _, body, signature = token.split(".")
+    other_head = _pyjwt_token(_payload(), headers={"kid": "other"}).split(".")[0]
+    forged = f"{other_head}.{body}.{signature}"
+
+    with pytest.raises(jwt.InvalidSignatureError):
+        _pyjwt_decode(forged)
+    assert security.verify_token(forged) is None
+
+
+def test_foreign_header_goes_through_pyjwt(pyjwt_calls):
+    token = _pyjwt_token(_payload(user_id=5), headers={"kid": "k1"})
+
+    assert security.verify_token(token) == _pyjwt_decode(token)
+    assert pyjwt_calls == [token]
+
+
+def test_expired_token_rejected():
+    token = _pyjwt_token(_payload(user_id=6, exp=int(time.time()) - 1))
+
+    with pytest.raises(jwt.ExpiredSignatureError):
+        _pyjwt_decode(token)
+    assert security.verify_token(token) is None
+
+
+def test_wrong_type_rejected():
+    token = _pyjwt_token(_payload(user_id=7, type="refresh"))
+
+    assert _pyjwt_decode(token)["type"] == "refresh"
+    assert security.verify_token(token) is None
+
+
+def test_refresh_token_not_accepted_as_access():
+    token = security.create_refresh_token({"user_id": 8, "login": "erin"})
+
+    assert security.verify_token(token, is_refresh=True) is not None
+    assert security.verify_token(token) is None
+
+
+def test_iat_token_takes_fallback(pyjwt_calls):
+    token = _pyjwt_token(_payload(user_id=9, iat=int(time.time())))
+
+    assert security.verify_token(token) == _pyjwt_decode(token)
+    assert pyjwt_calls == [token]
+
+
+@pytest.mark.parametrize(
+    ("claims", "error"),
+    [
+        ({"sub": 42}, jwt.exceptions.InvalidSubjectError),
+        ({"jti": 42}, jwt.exceptions.InvalidJTIError),
+    ],
+)
+def test_non_string_sub_jti_rejected(claims, error):
+    token = _pyjwt_token(_payload(user_id=10, **claims))
+
+    with pytest.raises(error):
+        _pyjwt_decode(token)
+    assert security.verify_token(token) is None
+
+
+def test_cached_payload_is_not_shared():
+    token = security.create_access_token({"user_id": 11, "login": "frank"})
+
+    first = security.verify_token(token)
+    first.pop("type")
+
+    assert security.verify_token(token)["type"] == "access"
+
+
+def test_fallback_parses_payload_with_orjson(monkeypatch):
+    # _decode_payload — приватный хук PyJWT: если его переименуют, override
+    # молча перестанет вызываться, и этот тест это поймает
+    calls = []
+    original = security._OrjsonJWT._decode_payload
+
+    def spy(self, decoded):
+        calls.append(decoded["payload"])
+        return original(self, decoded)
+
+    monkeypatch.setattr(security._OrjsonJWT, "_decode_payload", spy)
+    token = _pyjwt_token(_payload(user_id=12, iat=int(time.time())))
+
+    assert security.verify_token(token) == _pyjwt_decode(token)
+    assert len(calls) == 1
+
+
+def test_sync_hash_runs_in_argon2_pool(monkeypatch):
+    threads = []
+    original = security._hash_password
+
+    def spy(password):
+        threads.append(threading.current_thread().name)
+        return original(password)
+
+    monkeypatch.setattr(security, "_hash_password", spy)
+    hashed = security.get_password_hash("secret")
+
+    assert threads[0].startswith("argon2")
+
+    assert security.verify_password("secret", hashed)[0]
+    with pytest.raises(ValueError):
+        security.get_password_hash("x" * (security._MAX_PW_BYTES + 1))
+
+
+@pytest.mark.parametrize(
+    "field",
+    [
+        "ARGON2_MEMORY_KIB",
+        "ARGON2_TIME_COST",
+        "ARGON2_PARALLELISM",
+        "ARGON2_MEMORY_BUDGET_MIB",
+    ],
+)
+def test_argon2_settings_must_be_positive(monkeypatch, field):
+    from pydantic import ValidationError
+
+    monkeypatch.setenv(field, "0")
+    with pytest.raises(ValidationError):
+        type(config)()